@@ -14,9 +14,11 @@ from app.services.auth_service import (
     SECRET_KEY,
 )
 from app.services.db import get_session
+from app.util.responses import ModelResponse
 
 router = APIRouter(tags=["auth"])
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 auth_service = AuthService()
 db_dependency = Annotated[Session, Depends(get_session)]
 
@@ -36,32 +38,41 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
     return userid
 
 
+def optional_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
+) -> str | None:
+    """Like verify_token, but anonymous callers get None instead of a 403."""
+    if credentials is None:
+        return None
+    return verify_token(credentials)
+
+
 @router.post("/signup", response_model=UserResponse)
-async def signup(user: UserCreate, db: db_dependency) -> UserResponse:
+async def signup(user: UserCreate, db: db_dependency):
     existing = db.execute(
         db.query(Users).where(Users.userid == user.userid)
     ).scalar_one_or_none()
     if existing:
         raise HTTPException(status_code=400, detail="User already exists")
     auth_service.register_user(db, user.userid, user.password)
-    return UserResponse(userid=user.userid, message="User created successfully")
+    return ModelResponse(UserResponse(userid=user.userid, message="User created successfully"))
 
 
 @router.post("/login", response_model=Token)
-async def login(user: UserLogin, db: db_dependency) -> Token:
+async def login(user: UserLogin, db: db_dependency):
     if not auth_service.authenticate_user(db, user.userid, user.password):
         raise HTTPException(status_code=401, detail="Incorrect userid or password")
-    return auth_service.create_access_token(
+    return ModelResponse(auth_service.create_access_token(
         subject=user.userid,
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
-    )
+    ))
 
 # you can use it by typing the token which you got from the login endpoint
 @router.get("/protected", response_model=UserResponse)
-async def protected_route(userid: str = Depends(verify_token)) -> UserResponse:
-    return UserResponse(userid=userid, message=f"Hello {userid}! This is a protected route.")
+async def protected_route(userid: str = Depends(verify_token)):
+    return ModelResponse(UserResponse(userid=userid, message=f"Hello {userid}! This is a protected route."))
 
 
 @router.get("/users/me", response_model=UserResponse)
-async def read_users_me(userid: str = Depends(verify_token)) -> UserResponse:
-    return UserResponse(userid=userid, message=f"Current user: {userid}")
\ No newline at end of file
+async def read_users_me(userid: str = Depends(verify_token)):
+    return ModelResponse(UserResponse(userid=userid, message=f"Current user: {userid}"))
\ No newline at end of file
@@ -1,16 +1,50 @@
+import asyncio
 import json
 import re
 import html
 import ast
-from typing import Any, Dict, List, Optional, Tuple
-
-from fastapi import APIRouter, HTTPException, status
-
-from app.models.request_models import CreateAIQueryRequest, QuizGenerationRequest
+from concurrent.futures import Executor
+from typing import Annotated, Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.orm import Session
+
+from app.api.auth import optional_user
+from app.models.request_models import (
+    AdaptiveQuizRequest,
+    AdaptiveQuizResponse,
+    CreateAIQueryRequest,
+    HintRequest,
+    HintResponse,
+    QueryResponse,
+    QuizGenerationRequest,
+    QuizResponse,
+)
+from app.services.adaptive_service import DIFFICULTY_LEVELS, AdaptiveQuizEngine, AdaptiveQuizError
 from app.services.ai_service import CreateAIService, CreateAIServiceError
+from app.services.conversation_service import ConversationSession, ConversationStore
+from app.services.db import ReadSessionLocal, get_read_session, get_session
+from app.services.embedding_service import get_embedding_service
+from app.services.hint_service import HintCache, HintGenerationInterrupted, hint_cache_key
+from app.services.question_bank_service import QuestionBankService
+from app.services.question_index import ModuleQuestionHistory, question_fingerprint_text
+from app.services.question_snapshot import SnapshotReader
+from app.services.tenant_service import Tenant, TenantConfig, get_tenant
+from app.util.admission import AdmissionRejected, admission_controller
+from app.util.responses import ModelResponse
 
 router = APIRouter(tags=["ai"])
-createai_service = CreateAIService()
+conversation_store = ConversationStore()
+question_history = ModuleQuestionHistory()
+adaptive_engine = AdaptiveQuizEngine()
+question_bank = QuestionBankService()
+question_snapshots = SnapshotReader()
+hint_cache = HintCache()
+db_dependency = Annotated[Session, Depends(get_session)]
+read_db_dependency = Annotated[Session, Depends(get_read_session)]
+tenant_dependency = Annotated[Tenant, Depends(get_tenant)]
 
 
 # -----------------------
@@ -324,6 +358,7 @@ def _validate_questions_list(questions_raw: Any, expected_num: int) -> List[Dict
         qid = str(q.get("id", str(idx)))
         prompt = str(q.get("prompt", "")).strip()
         hint = q.get("hint", "") or ""
+        difficulty = str(q.get("difficulty") or "").strip().lower()
         raw_choices = q.get("choices", []) or []
 
         # normalize dict-of-choices to list (if needed)
@@ -372,12 +407,16 @@ def _validate_questions_list(questions_raw: Any, expected_num: int) -> List[Dict
         if len(final_choices) != 4:
             continue
 
-        validated.append({
+        item = {
             "id": qid,
             "prompt": prompt,
             "choices": final_choices,
             "hint": str(hint)
-        })
+        }
+        # Prior difficulty for adaptive quizzes
+        if difficulty in DIFFICULTY_LEVELS:
+            item["difficulty"] = difficulty
+        validated.append(item)
 
     if not validated:
         raise ValueError("No valid questions found after validation")
@@ -386,16 +425,18 @@ def _validate_questions_list(questions_raw: Any, expected_num: int) -> List[Dict
     return validated[:expected_num]
 
 
+def extract_response_text(result: Any) -> str:
+    """Get the response text from the typical locations in a CreateAI result."""
+    if isinstance(result, dict):
+        return result.get("response", "") or result.get("result", {}).get("response", "") or ""
+    return str(result)
+
+
 def extract_and_validate_questions_from_ai_result(result: Any, expected_num: int) -> List[Dict[str, Any]]:
     """
     High-level helper: extract text from result, forgiving-parse it, and validate/normalize the questions list.
     """
-    # Get the response text from typical locations
-    response_text = ""
-    if isinstance(result, dict):
-        response_text = result.get("response", "") or result.get("result", {}).get("response", "") or ""
-    else:
-        response_text = str(result)
+    response_text = extract_response_text(result)
 
     if not response_text:
         raise ValueError("Empty response from AI service")
@@ -421,163 +462,517 @@ def extract_and_validate_questions_from_ai_result(result: Any, expected_num: int
 
 
 # -----------------------
-# API endpoints
+# Quiz generation
 # -----------------------
 
-@router.post("/query")
-async def query_createai(request: CreateAIQueryRequest):
+def _banked_fingerprints(course_id: str, module_id: str) -> List[str]:
+    """Fingerprints of the module's banked questions, to seed its near-duplicate history."""
+    db = ReadSessionLocal()
     try:
-        result = await createai_service.query(
-            prompt=request.prompt,
-            context=request.context,
-            system_prompt=request.system_prompt,
-            session_id=request.session_id,
-            temperature=request.temperature,
-            top_p=request.top_p,
-            top_k=request.top_k,
-            endpoint=request.endpoint,
-            enable_search=request.enable_search,
-            search_params=request.search_params,
-            extra_input=request.extra_input,
-            extra_model_params=request.extra_model_params,
+        banked = question_bank.load_module(
+            db, course_id, module_id, limit=question_history.max_entries_per_module
         )
-    except CreateAIServiceError as exc:
-        status_code = exc.status_code or status.HTTP_502_BAD_GATEWAY
-        raise HTTPException(status_code=status_code, detail=str(exc)) from exc
-
-    return {"result": result}
-
-
-@router.post("/quiz")
-async def generate_quiz(request: QuizGenerationRequest):
+    finally:
+        db.close()
+    return [question_fingerprint_text(q) for q in banked]
+
+
+async def generate_module_questions(
+    quiz_service: CreateAIService,
+    course: TenantConfig,
+    module_id: str,
+    questions_needed: int = 10,
+    max_attempts: int = 5,
+    parse_executor: Executor | None = None,
+    include_hints: bool = True,
+    allow_repeats: bool = True,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
-    Generate quiz questions for a specific module using the CreateAI API.
-    Always generates exactly 10 questions.
-    Returns questions in the format expected by the frontend.
+    Ask CreateAI for questions until questions_needed unique ones are collected or max_attempts
+    upstream calls have been made. Parsing runs on parse_executor when one is given (the batch job
+    uses a process pool). Without include_hints the model is not asked for hints, which keeps the
+    output (and the truncation risk) smaller.
+    Returns (new, repeats): repeats are near-duplicates of questions already served for the module,
+    used to top up a short result unless allow_repeats is False. Only new questions may be banked.
+    Raises ValueError if nothing usable came back.
     """
     all_questions: List[Dict[str, Any]] = []
-    questions_needed = 10  # Always generate 10 questions
-    max_attempts = 5  # Maximum number of API calls to make
+    # Unique within this quiz but near-duplicates of questions already served for the module;
+    # only used to top up the quiz if the attempts run out.
+    previously_served: List[Dict[str, Any]] = []
+    vectors_by_fingerprint: Dict[str, Any] = {}
+    quiz_index = question_history.new_quiz_index()
+    embeddings = get_embedding_service()
+    module_key = (course.course_id, module_id)
+    if not question_history.is_seeded(module_key):
+        banked = await asyncio.to_thread(_banked_fingerprints, *module_key)
+        question_history.seed(module_key, banked, await embeddings.embed_many(banked))
+    module_index = question_history.index_for(module_key)
     attempt = 0
-    
-    try:
-        # Use a longer timeout for quiz generation (90 seconds)
-        quiz_service = CreateAIService(timeout=90.0)
+    if include_hints:
+        hint_rule = "5. Include a brief hint that guides students toward the correct answer\n"
+        hint_field = ',\n    "hint": "Helpful hint text"'
+    else:
+        hint_rule = hint_field = ""
 
-        while len(all_questions) < questions_needed and attempt < max_attempts:
-            attempt += 1
-            remaining = questions_needed - len(all_questions)
-            
-            # Adjust prompt based on how many questions we still need
-            if attempt == 1:
-                quiz_prompt = f"""Generate 10 multiple-choice quiz questions for Module {request.module_id} of CSE 230 Assembly Language Programming.
+    while len(all_questions) < questions_needed and attempt < max_attempts:
+        attempt += 1
+        remaining = questions_needed - len(all_questions)
+        
+        # Adjust prompt based on how many questions we still need
+        if attempt == 1:
+            quiz_prompt = f"""Generate {questions_needed} multiple-choice quiz questions for Module {module_id} of {course.title}.
 
-IMPORTANT: You MUST generate exactly 10 questions. Do not stop early. Generate ALL 10 questions.
+IMPORTANT: You MUST generate exactly {questions_needed} questions. Do not stop early. Generate ALL {questions_needed} questions.
 
 Each question should:
-1. Test understanding of Assembly language concepts specific to Module {request.module_id}
+1. Test understanding of {course.title} concepts specific to Module {module_id}
 2. Have exactly 4 answer choices (A, B, C, D)
 3. Have exactly one correct answer
-4. Include a brief hint that guides students toward the correct answer
-
+4. Be rated "easy", "medium" or "hard" for students taking the course
+{hint_rule}
 Return the response as a valid JSON array with this exact structure:
 [
   {{
     "id": "1",
     "prompt": "Question text here?",
+    "difficulty": "medium",
     "choices": [
       {{"id": "A", "text": "Choice A text", "isCorrect": false}},
       {{"id": "B", "text": "Choice B text", "isCorrect": true}},
       {{"id": "C", "text": "Choice C text", "isCorrect": false}},
       {{"id": "D", "text": "Choice D text", "isCorrect": false}}
-    ],
-    "hint": "Helpful hint text"
+    ]{hint_field}
   }}
 ]
 
-Make sure the questions are relevant to Module {request.module_id} content and progressively test different aspects of the material.
-Remember: Generate ALL 10 questions in your response."""
-            else:
-                # For follow-up requests, ask for the remaining questions
-                existing_ids = {q.get("id") for q in all_questions}
-                quiz_prompt = f"""Generate {remaining} additional multiple-choice quiz questions for Module {request.module_id} of CSE 230 Assembly Language Programming.
+Make sure the questions are relevant to Module {module_id} content and progressively test different aspects of the material.
+Remember: Generate ALL {questions_needed} questions in your response."""
+        else:
+            # For follow-up requests, ask for the remaining questions
+            avoid_list = "\n".join(f"- {q['prompt'][:160]}" for q in all_questions + previously_served)
+            quiz_prompt = f"""Generate {remaining} additional multiple-choice quiz questions for Module {module_id} of {course.title}.
 
 IMPORTANT: Generate exactly {remaining} NEW questions. Do not repeat questions. Generate questions with IDs starting from {len(all_questions) + 1}.
 
 Each question should:
-1. Test understanding of Assembly language concepts specific to Module {request.module_id}
+1. Test understanding of {course.title} concepts specific to Module {module_id}
 2. Have exactly 4 answer choices (A, B, C, D)
 3. Have exactly one correct answer
-4. Include a brief hint that guides students toward the correct answer
-
+4. Be rated "easy", "medium" or "hard" for students taking the course
+{hint_rule}
 Return the response as a valid JSON array with this exact structure:
 [
   {{
     "id": "{len(all_questions) + 1}",
     "prompt": "Question text here?",
+    "difficulty": "medium",
     "choices": [
       {{"id": "A", "text": "Choice A text", "isCorrect": false}},
       {{"id": "B", "text": "Choice B text", "isCorrect": true}},
       {{"id": "C", "text": "Choice C text", "isCorrect": false}},
       {{"id": "D", "text": "Choice D text", "isCorrect": false}}
-    ],
-    "hint": "Helpful hint text"
+    ]{hint_field}
   }}
 ]
 
+Do NOT generate questions similar to these existing ones:
+{avoid_list}
+
 Generate exactly {remaining} questions. Do not stop early."""
 
-            result = await quiz_service.query(
-                prompt=quiz_prompt,
-                context=f"Module {request.module_id}",
-                system_prompt="Generate multiple-choice quiz questions for the given module. Always generate the exact number of questions requested.",
-                enable_search=True,
-                temperature=0.7,
-            )
+        result = await quiz_service.query(
+            prompt=quiz_prompt,
+            context=f"Module {module_id}",
+            system_prompt="Generate multiple-choice quiz questions for the given module. Always generate the exact number of questions requested.",
+            enable_search=True,
+            temperature=0.7,
+        )
 
-            # Use the robust helper to extract and validate questions
-            try:
+        # Use the robust helper to extract and validate questions
+        try:
+            if parse_executor is None:
                 new_questions = extract_and_validate_questions_from_ai_result(result, expected_num=remaining)
+            else:
+                new_questions = await asyncio.get_running_loop().run_in_executor(
+                    parse_executor, extract_and_validate_questions_from_ai_result, result, remaining
+                )
+            
+            # Avoid duplicates by content: IDs restart with every attempt
+            fingerprints = [question_fingerprint_text(q) for q in new_questions]
+            vectors = await embeddings.embed_many(fingerprints)
+            for q, fingerprint, vector in zip(new_questions, fingerprints, vectors):
+                if not quiz_index.add_if_new(fingerprint, vector):
+                    continue
+                vectors_by_fingerprint[fingerprint] = vector
+                if module_index.find_duplicate(fingerprint, vector=vector):
+                    previously_served.append(q)
+                    continue
+                all_questions.append(q)
+            
+            # If we got no new questions, break to avoid infinite loop
+            if not new_questions:
+                break
                 
-                # Avoid duplicates by checking IDs
-                existing_ids = {q.get("id") for q in all_questions}
-                for q in new_questions:
-                    if q.get("id") not in existing_ids:
-                        all_questions.append(q)
-                        existing_ids.add(q.get("id"))
-                
-                # If we got no new questions, break to avoid infinite loop
-                if not new_questions:
-                    break
-                    
-            except ValueError as ve:
-                # If parsing fails and we have some questions, return what we have
-                if all_questions:
-                    break
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Could not parse quiz questions from AI response: {str(ve)}"
+        except ValueError as ve:
+            # If parsing fails and we have some questions, return what we have
+            if all_questions or previously_served:
+                break
+            raise ValueError(f"Could not parse quiz questions from AI response: {str(ve)}") from ve
+
+    new_questions = all_questions[:questions_needed]
+    repeats = previously_served[:questions_needed - len(new_questions)] if allow_repeats else []
+    if not new_questions and not repeats:
+        raise ValueError("All generated questions repeat ones already served for this module")
+
+    for q in new_questions:
+        fingerprint = question_fingerprint_text(q)
+        module_index.add(fingerprint, vector=vectors_by_fingerprint.get(fingerprint))
+    return new_questions, repeats
+
+
+async def generate_question_help(
+    service: CreateAIService,
+    course: TenantConfig,
+    module_id: str,
+    kind: str,
+    questions: List[Dict[str, Any]],
+) -> List[str]:
+    """
+    Generate hints (before answering) or explanations (after answering) for several questions in
+    one upstream call. Returns one text per question, empty where the model skipped one.
+    """
+    numbered = [
+        {"id": str(i), "prompt": q["prompt"], "choices": q["choices"]}
+        for i, q in enumerate(questions, start=1)
+    ]
+    if kind == "hint":
+        instruction = "For each question, write a brief hint that guides students toward the correct answer without revealing it."
+    else:
+        instruction = "For each question, explain in 2-4 sentences why the correct answer is right and why the other choices are wrong."
+
+    help_prompt = f"""{instruction}
+
+Questions for Module {module_id} of {course.title}:
+{json.dumps(numbered, indent=2)}
+
+Return the response as a valid JSON array with exactly one item per question and this exact structure:
+[
+  {{"id": "1", "text": "..."}}
+]"""
+
+    result = await service.query(
+        prompt=help_prompt,
+        context=f"Module {module_id}",
+        system_prompt="Write concise study help for multiple-choice quiz questions.",
+        enable_search=True,
+        temperature=0.3,
+    )
+    parsed = forgiving_parse_json_like(extract_response_text(result))
+    if not isinstance(parsed, list):
+        raise ValueError("Parsed value is not a list")
+
+    texts: Dict[str, str] = {}
+    for item in parsed:
+        if isinstance(item, dict) and item.get("id") is not None:
+            texts[str(item["id"])] = str(item.get("text") or item.get(kind) or "").strip()
+    return [texts.get(str(i), "") for i in range(1, len(questions) + 1)]
+
+
+# -----------------------
+# API endpoints
+# -----------------------
+
+def _overloaded(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _prepare_query(
+    request: CreateAIQueryRequest, userid: str | None, tenant: Tenant
+) -> Tuple[Optional[ConversationSession], Optional[str], Optional[str]]:
+    """Resolve (history session, upstream context, upstream session_id) for a tutor query."""
+    if not request.use_history:
+        return None, request.context, request.session_id
+    # Conversations are kept per course as well as per user.
+    # Anonymous users share a namespace, so they can only resume session ids the store issued.
+    session = conversation_store.get_or_create(
+        f"{tenant.course_id}:{userid or 'anonymous'}", request.session_id, issued_only=userid is None
+    )
+    context = conversation_store.build_context(session, request.prompt, request.context)
+    return session, context, session.session_id
+
+
+@router.post("/query", response_model=QueryResponse)
+async def query_createai(
+    request: CreateAIQueryRequest, tenant: tenant_dependency, userid: str | None = Depends(optional_user)
+):
+    """
+    Forward a tutor prompt to CreateAI. With use_history, the conversation is kept server-side
+    per (user, session_id) and the recent turns plus a rolling summary are sent as context.
+    """
+    session, context, session_id = _prepare_query(request, userid, tenant)
+
+    try:
+        result = await tenant.service.query(
+            prompt=request.prompt,
+            context=context,
+            system_prompt=request.system_prompt,
+            session_id=session_id,
+            temperature=request.temperature,
+            top_p=request.top_p,
+            top_k=request.top_k,
+            endpoint=request.endpoint,
+            enable_search=request.enable_search,
+            search_params=request.search_params,
+            extra_input=request.extra_input,
+            extra_model_params=request.extra_model_params,
+        )
+    except CreateAIServiceError as exc:
+        status_code = exc.status_code or status.HTTP_502_BAD_GATEWAY
+        raise HTTPException(status_code=status_code, detail=str(exc)) from exc
+
+    if session is not None:
+        conversation_store.record(session, request.prompt, extract_response_text(result))
+        return ModelResponse(QueryResponse(result=result, session_id=session.session_id))
+    return ModelResponse(QueryResponse(result=result))
+
+
+def _sse_event(data: Any, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.post("/query/stream")
+async def stream_query_createai(
+    request: CreateAIQueryRequest, tenant: tenant_dependency, userid: str | None = Depends(optional_user)
+):
+    """
+    Server-sent events version of /query. The answer text is forwarded as `data: {"delta": ...}`
+    events as soon as it arrives, followed by an `event: done` (or `event: error`) message.
+    The upstream request is opened before responding, so configuration and upstream errors get
+    a real status code; only failures partway through the stream are reported in-band.
+    If the client disconnects, the stream is cancelled and the upstream connection closed.
+    """
+    session, context, session_id = _prepare_query(request, userid, tenant)
+
+    try:
+        upstream = await tenant.service.open_stream(
+            prompt=request.prompt,
+            context=context,
+            system_prompt=request.system_prompt,
+            session_id=session_id,
+            temperature=request.temperature,
+            top_p=request.top_p,
+            top_k=request.top_k,
+            endpoint=request.endpoint,
+            enable_search=request.enable_search,
+            search_params=request.search_params,
+            extra_input=request.extra_input,
+            extra_model_params=request.extra_model_params,
+        )
+    except CreateAIServiceError as exc:
+        status_code = exc.status_code or status.HTTP_502_BAD_GATEWAY
+        raise HTTPException(status_code=status_code, detail=str(exc)) from exc
+
+    async def events():
+        chunks: List[str] = []
+        try:
+            async for text in upstream.text():
+                chunks.append(text)
+                yield _sse_event({"delta": text})
+        except CreateAIServiceError as exc:
+            # Headers are already sent, so errors are reported in-band.
+            status_code = exc.status_code or status.HTTP_502_BAD_GATEWAY
+            yield _sse_event({"status_code": status_code, "detail": str(exc)}, event="error")
+            return
+
+        if session is not None:
+            conversation_store.record(session, request.prompt, "".join(chunks))
+        yield _sse_event({"session_id": session_id}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Closes the upstream even if the client left before the body was read.
+        background=BackgroundTask(upstream.aclose),
+    )
+
+
+@router.post("/quiz", response_model=QuizResponse)
+async def generate_quiz(
+    request: QuizGenerationRequest, db: db_dependency, read_db: read_db_dependency, tenant: tenant_dependency
+):
+    """
+    Generate quiz questions for a specific module using the CreateAI API.
+    Always generates exactly 10 questions.
+    Returns questions in the format expected by the frontend.
+    Modules with enough pre-generated questions are served without an upstream call: from the
+    memory-mapped bank snapshot when one is published, otherwise from the bank table.
+    Only questions generated with their hints are banked, since banked quizzes are served as-is.
+    """
+    questions_needed = 10  # Always generate 10 questions
+
+    try:
+        final_questions = question_snapshots.sample(
+            tenant.course_id, request.module_id, questions_needed, min_questions=question_bank.min_questions
+        )
+        if final_questions is None:
+            final_questions = question_bank.sample_quiz(
+                read_db, tenant.course_id, request.module_id, questions_needed
+            )
+        if final_questions is None:
+            # Use a longer timeout for quiz generation (90 seconds)
+            quiz_service = tenant.service.with_timeout(90.0)
+            async with admission_controller.slot("generate"):
+                new_questions, repeats = await generate_module_questions(
+                    quiz_service,
+                    tenant.config,
+                    request.module_id,
+                    questions_needed,
+                    include_hints=not request.lazy_hints,
                 )
+            # Repeats are already in the bank; banking them again would let one quiz draw a question twice.
+            hinted = [q for q in new_questions if q.get("hint")]
+            if hinted:
+                question_bank.save_questions(db, tenant.course_id, request.module_id, hinted)
+            final_questions = new_questions + repeats
+
+        # Make these questions available to adaptive quizzes
+        adaptive_engine.register_questions(tenant.course_id, request.module_id, final_questions)
 
-        # Ensure we have exactly 10 questions
-        final_questions = all_questions[:10]
-        
         # Re-number questions to be sequential
         for i, q in enumerate(final_questions, start=1):
             q["id"] = str(i)
 
-        return {
+        return ModelResponse(QuizResponse.model_validate({
             "moduleId": request.module_id,
             "questions": final_questions
-        }
+        }))
 
+    except AdmissionRejected as exc:
+        raise _overloaded(exc) from exc
     except CreateAIServiceError as exc:
         status_code = exc.status_code or status.HTTP_502_BAD_GATEWAY
         raise HTTPException(status_code=status_code, detail=str(exc)) from exc
     except HTTPException:
         raise
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(exc)
+        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating quiz: {str(exc)}"
-        ) from exc
\ No newline at end of file
+        ) from exc
+
+
+@router.post("/quiz/next", response_model=AdaptiveQuizResponse)
+async def next_adaptive_question(
+    request: AdaptiveQuizRequest, tenant: tenant_dependency, userid: str | None = Depends(optional_user)
+):
+    """
+    Adaptive quiz: start an attempt (no attempt_id) or submit the answer to the pending question,
+    and receive the next most informative question for the student's current ability estimate.
+    """
+    owner = userid or "anonymous"
+    last_correct: bool | None = None
+    try:
+        if request.attempt_id is None:
+            attempt = adaptive_engine.start_attempt(
+                owner, tenant.course_id, request.module_id, request.max_questions
+            )
+        else:
+            attempt = adaptive_engine.get_attempt(owner, request.attempt_id)
+            if (attempt.course_id, attempt.module_id) != (tenant.course_id, request.module_id):
+                raise AdaptiveQuizError("Attempt belongs to a different module.", status_code=409)
+            if request.answer is not None:
+                last_correct = adaptive_engine.record_answer(
+                    attempt, request.answer.question_id, request.answer.choice_id
+                )
+        question = adaptive_engine.next_question(attempt)
+    except AdaptiveQuizError as exc:
+        raise HTTPException(status_code=exc.status_code or status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    return ModelResponse(AdaptiveQuizResponse.model_validate({
+        "moduleId": request.module_id,
+        "attemptId": attempt.attempt_id,
+        "question": question,
+        "done": question is None,
+        "lastAnswerCorrect": last_correct,
+        "answered": len(attempt.responses),
+        "ability": round(attempt.theta, 3),
+        "standardError": round(attempt.standard_error, 3),
+    }))
+
+
+@router.post("/quiz/hints", response_model=HintResponse)
+async def quiz_hints(request: HintRequest, tenant: tenant_dependency):
+    """
+    Hints or post-answer explanations on demand, for quizzes generated with lazy_hints.
+    Cached per question content; all uncached questions are generated in one upstream call.
+    """
+    questions = [q.model_dump(by_alias=True) for q in request.questions]
+    keys = [hint_cache_key(tenant.course_id, request.kind, q) for q in questions]
+    texts: Dict[str, str] = {}
+    waiting: Dict[str, asyncio.Future] = {}
+    to_generate: List[Tuple[str, Dict[str, Any]]] = []
+
+    seen: set = set()
+    for key, question in zip(keys, questions):
+        if key in seen:
+            continue
+        seen.add(key)
+        cached = hint_cache.get(key)
+        if cached is not None:
+            texts[key] = cached
+        elif (future := hint_cache.in_flight(key)) is not None:
+            waiting[key] = future
+        else:
+            hint_cache.claim(key)
+            to_generate.append((key, question))
+
+    try:
+        if to_generate:
+            try:
+                async with admission_controller.slot("generate"):
+                    generated = await generate_question_help(
+                        tenant.service.with_timeout(60.0),
+                        tenant.config,
+                        request.module_id,
+                        request.kind,
+                        [q for _, q in to_generate],
+                    )
+            except BaseException as exc:
+                for key, _ in to_generate:
+                    hint_cache.fail(key, exc)
+                raise
+            for (key, _), text in zip(to_generate, generated):
+                hint_cache.resolve(key, text)
+                texts[key] = text
+        for key, future in waiting.items():
+            texts[key] = await asyncio.shield(future) or ""
+    except CreateAIServiceError as exc:
+        status_code = exc.status_code or status.HTTP_502_BAD_GATEWAY
+        raise HTTPException(status_code=status_code, detail=str(exc)) from exc
+    except AdmissionRejected as exc:
+        raise _overloaded(exc) from exc
+    except HintGenerationInterrupted as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Could not parse {request.kind}s from AI response: {str(exc)}"
+        ) from exc
+
+    return ModelResponse(HintResponse.model_validate({
+        "moduleId": request.module_id,
+        "kind": request.kind,
+        "items": [{"id": q["id"], "text": texts.get(key, "")} for key, q in zip(keys, questions)],
+    }))
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+
+from app.services.db import pool_metrics
+from app.services.tenant_service import tenant_registry
+from app.util.admission import admission_controller
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("")
+async def health():
+    return {"status": "ok"}
+
+
+@router.get("/db")
+async def db_pool_health():
+    return {"pools": pool_metrics()}
+
+
+@router.get("/admission")
+async def admission_health():
+    return admission_controller.metrics()
+
+
+@router.get("/tenants")
+async def tenant_health():
+    return {"tenants": tenant_registry.metrics()}
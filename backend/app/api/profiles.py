@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.util.profiling import has_profile_access, profile_store
+
+router = APIRouter(tags=["debug"])
+
+
+def _require_profile_access(token: str | None) -> None:
+    if not has_profile_access(token):
+        # Don't advertise the endpoints to callers without the token.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+@router.get("/profiles")
+async def list_profiles(x_profile_token: str | None = Header(default=None)):
+    _require_profile_access(x_profile_token)
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_profile_token: str | None = Header(default=None)):
+    """Folded stacks for flamegraph.pl or speedscope."""
+    _require_profile_access(x_profile_token)
+    folded = profile_store.load_folded(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return PlainTextResponse(folded)
@@ -1,14 +1,28 @@
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.models import domain_models
 from app.services.db import engine
-from app.api import auth, fetch
+from app.services.tenant_service import tenant_registry
+from app.api import auth, fetch, health, profiles
+from app.util.admission import AdmissionMiddleware
+from app.util.http_cache import HTTPCacheMiddleware
+from app.util.profiling import ProfilingMiddleware
     #, webhooks, ai, analytics, pushback, health
 
-app = FastAPI(title="Canvas AI Tutor")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close each course's pooled CreateAI connections.
+    await tenant_registry.aclose()
+
+
+app = FastAPI(title="Canvas AI Tutor", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 raw_origins = os.getenv("CORS_ALLOW_ORIGINS")
 if raw_origins:
@@ -25,6 +39,9 @@ if "*" in allowed_origins:
     allowed_origins = ["*"]
     allow_credentials = False
 
+# Innermost, so shed requests still get CORS headers and the browser sees the 503.
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -33,11 +50,17 @@ app.add_middleware(
     allow_credentials=allow_credentials,
 )
 
+# Added after CORS so it wraps it: CORS headers are part of the cached/compressed response.
+app.add_middleware(HTTPCacheMiddleware)
+# Outermost, so a profile covers every other layer of the request.
+app.add_middleware(ProfilingMiddleware)
+
 domain_models.Base.metadata.create_all(bind=engine)
 
-# app.include_router(health.router, prefix="/")
+app.include_router(health.router, prefix="/health")
 app.include_router(auth.router, prefix="/auth")
 app.include_router(fetch.router, prefix="/fetch")
+app.include_router(profiles.router, prefix="/debug")
 # app.include_router(webhooks.router, prefix="/webhooks")
 # app.include_router(ai.router, prefix="/ai")
 # app.include_router(analytics.router, prefix="/analytics")
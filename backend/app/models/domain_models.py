@@ -1,10 +1,36 @@
-
 from app.services.db import Base
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import JSON, Column, Integer, Index, String, DateTime, UniqueConstraint, func
 
 class Users(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key =True, index=True)
     userid = Column(String, unique=True)
     hashed_password = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class BankQuestion(Base):
+    """A validated quiz question (the /fetch/quiz shape) stored for reuse."""
+    __tablename__ = "bank_questions"
+    __table_args__ = (Index("ix_bank_questions_course_module", "course_id", "module_id"),)
+    id = Column(Integer, primary_key=True, index=True)
+    course_id = Column(String, nullable=False)
+    module_id = Column(String, nullable=False)
+    prompt = Column(String, nullable=False)
+    question = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PregenerationCheckpoint(Base):
+    """Progress of one course module within a batch pre-generation run, used to resume interrupted runs."""
+    __tablename__ = "pregeneration_checkpoints"
+    __table_args__ = (UniqueConstraint("run_id", "course_id", "module_id"),)
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True, nullable=False)
+    course_id = Column(String, nullable=False)
+    module_id = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    target = Column(Integer, nullable=False)
+    generated = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,7 @@
-from pydantic import BaseModel, Field
+from typing import Any, Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.alias_generators import to_camel
 
 
 class UserCreate(BaseModel):
@@ -34,8 +37,96 @@ class CreateAIQueryRequest(BaseModel):
     search_params: dict | None = None
     extra_input: dict | None = None
     extra_model_params: dict | None = None
+    use_history: bool = False
 
 
 class QuizGenerationRequest(BaseModel):
     module_id: str
     num_questions: int = Field(ge=1, le=20, default=10)
+    # Skip hints in the generation call; fetch them on demand from /fetch/quiz/hints.
+    lazy_hints: bool = False
+
+
+class AdaptiveAnswer(BaseModel):
+    question_id: str
+    choice_id: str
+
+
+class AdaptiveQuizRequest(BaseModel):
+    module_id: str
+    attempt_id: str | None = None
+    answer: AdaptiveAnswer | None = None
+    max_questions: int = Field(ge=1, le=50, default=10)
+
+
+# -----------------------
+# Response models
+# -----------------------
+
+class CamelModel(BaseModel):
+    """Response models serialized with the camelCase keys the frontend expects."""
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+
+class QuizChoice(CamelModel):
+    id: str
+    text: str
+    is_correct: bool
+
+
+class QuizQuestion(CamelModel):
+    id: str
+    prompt: str
+    choices: list[QuizChoice]
+    hint: str = ""
+
+
+class AdaptiveChoice(CamelModel):
+    id: str
+    text: str
+
+
+class AdaptiveQuestion(CamelModel):
+    """A question served during an adaptive attempt; answers are scored server-side, so no isCorrect."""
+    id: str
+    prompt: str
+    choices: list[AdaptiveChoice]
+    hint: str = ""
+
+
+class QuizResponse(CamelModel):
+    module_id: str
+    questions: list[QuizQuestion]
+
+
+class QueryResponse(BaseModel):
+    result: Any
+    session_id: str | None = None
+
+
+class AdaptiveQuizResponse(CamelModel):
+    module_id: str
+    attempt_id: str
+    question: AdaptiveQuestion | None
+    done: bool
+    last_answer_correct: bool | None
+    answered: int
+    ability: float
+    standard_error: float
+
+
+class HintRequest(BaseModel):
+    module_id: str
+    kind: Literal["hint", "explanation"] = "hint"
+    questions: list[QuizQuestion] = Field(min_length=1, max_length=20)
+
+
+class HintItem(CamelModel):
+    id: str
+    text: str
+
+
+class HintResponse(CamelModel):
+    module_id: str
+    kind: str
+    items: list[HintItem]
@@ -0,0 +1,147 @@
+"""
+Batch quiz pre-generation.
+
+Tops the question bank of every module of a course (--course-id) up to --target questions ahead
+of time, so /fetch/quiz can serve from it without waiting on CreateAI; modules already at the
+target are left alone. Progress is checkpointed per (run, course, module) in the database;
+running again with the same --run-id (by default today's date) resumes where an interrupted run
+stopped.
+
+    python -m app.pregenerate --modules 1 2 3 4 5 --target 50 --concurrency 2 --workers 4
+
+With --publish-snapshot the whole bank (every course) is then written to QUESTION_SNAPSHOT_PATH, which the API
+workers memory-map and pick up without a restart.
+"""
+import argparse
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date
+
+from app.api.fetch import generate_module_questions, question_bank
+from app.models import domain_models
+from app.services.ai_service import CreateAIServiceError
+from app.services.db import SessionLocal, engine
+from app.services.question_snapshot import write_snapshot
+from app.services.tenant_service import Tenant, tenant_registry
+
+logger = logging.getLogger("app.pregenerate")
+
+BATCH_SIZE = 10
+
+
+def default_modules() -> list[str]:
+    return [m.strip() for m in os.getenv("COURSE_MODULES", "1,2,3,4,5").split(",") if m.strip()]
+
+
+async def pregenerate_module(
+    module_id: str,
+    run_id: str,
+    target: int,
+    upstream_limit: asyncio.Semaphore,
+    parse_executor: Executor,
+    tenant: Tenant,
+    max_failures: int = 3,
+) -> None:
+    course_id = tenant.course_id
+    db = SessionLocal()
+    try:
+        checkpoint = question_bank.get_checkpoint(db, run_id, course_id, module_id, target)
+        if checkpoint.status == "done":
+            logger.info("%s module %s: already done in run %s, skipping", course_id, module_id, run_id)
+            return
+
+        quiz_service = tenant.service.with_timeout(90.0)
+        failures = 0
+        while (banked := question_bank.count(db, course_id, module_id)) < checkpoint.target:
+            batch = min(BATCH_SIZE, checkpoint.target - banked)
+            try:
+                async with upstream_limit:
+                    questions, _ = await generate_module_questions(
+                        quiz_service,
+                        tenant.config,
+                        module_id,
+                        batch,
+                        parse_executor=parse_executor,
+                        allow_repeats=False,
+                    )
+            except (CreateAIServiceError, ValueError) as exc:
+                failures += 1
+                logger.warning(
+                    "%s module %s: batch failed (%d/%d): %s", course_id, module_id, failures, max_failures, exc
+                )
+                if failures >= max_failures:
+                    question_bank.mark_failed(db, checkpoint, str(exc))
+                    return
+                continue
+
+            question_bank.save_batch(db, checkpoint, questions)
+            logger.info(
+                "%s module %s: %d/%d questions banked",
+                course_id, module_id, question_bank.count(db, course_id, module_id), checkpoint.target,
+            )
+        if checkpoint.status != "done":
+            question_bank.mark_done(db, checkpoint)
+    finally:
+        db.close()
+
+
+async def run(
+    modules: list[str], run_id: str, target: int, concurrency: int, workers: int, tenant: Tenant
+) -> None:
+    upstream_limit = asyncio.Semaphore(concurrency)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as parse_executor:
+            await asyncio.gather(*(
+                pregenerate_module(module_id, run_id, target, upstream_limit, parse_executor, tenant)
+                for module_id in modules
+            ))
+    finally:
+        await tenant.aclose()
+
+
+def publish_snapshot(path: str) -> None:
+    # Read from the primary: a lagging replica could miss the batches this run just banked.
+    db = SessionLocal()
+    try:
+        modules = question_bank.load_all(db)
+    finally:
+        db.close()
+    version = write_snapshot(path, modules)
+    logger.info(
+        "published snapshot %s (version %d, %d questions)",
+        path, version, sum(len(questions) for questions in modules.values()),
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Pre-generate quiz questions for every module.")
+    parser.add_argument("--modules", nargs="+", default=default_modules(), help="Module ids (default: COURSE_MODULES)")
+    parser.add_argument("--target", type=int, default=50, help="Bank size to fill each module up to")
+    parser.add_argument("--run-id", default=date.today().isoformat(), help="Checkpoint key; reuse it to resume")
+    parser.add_argument("--concurrency", type=int, default=2, help="Maximum concurrent CreateAI calls")
+    parser.add_argument("--course-id", help="Course to generate for, with its CreateAI settings (default: the default course)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Parse/validate processes")
+    parser.add_argument(
+        "--publish-snapshot", action="store_true",
+        help="Write the question bank to QUESTION_SNAPSHOT_PATH after generating",
+    )
+    args = parser.parse_args(argv)
+
+    tenant = tenant_registry.get(args.course_id)
+    if tenant is None:
+        parser.error(f"unknown course id {args.course_id!r}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    domain_models.Base.metadata.create_all(bind=engine)
+    asyncio.run(run(args.modules, args.run_id, args.target, args.concurrency, args.workers, tenant))
+    if args.publish_snapshot:
+        snapshot_path = os.getenv("QUESTION_SNAPSHOT_PATH")
+        if not snapshot_path:
+            parser.error("--publish-snapshot requires QUESTION_SNAPSHOT_PATH to be set")
+        publish_snapshot(snapshot_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+import json
+import math
+import os
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from app.services.tenant_service import DEFAULT_TENANT
+
+
+# Quadrature grid for the ability posterior: -4.0 .. 4.0 in steps of 0.2.
+THETA_GRID = tuple(round(-4.0 + 0.2 * i, 1) for i in range(41))
+_GRID_SIZE = len(THETA_GRID)
+# Standard normal prior, stored as log-density.
+_LOG_PRIOR = tuple(-0.5 * t * t for t in THETA_GRID)
+# Guessing floor for four-choice items (3PL c parameter).
+DEFAULT_GUESSING = 0.25
+# Difficulty (3PL b parameter) for items labelled by their author or by the generating model.
+DIFFICULTY_LEVELS = {"easy": -1.0, "medium": 0.0, "hard": 1.0}
+# Observed responses to an item are blended with this many pseudo-responses at its prior difficulty.
+CALIBRATION_PRIOR_WEIGHT = 10.0
+
+
+class AdaptiveQuizError(Exception):
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _correct_choice_index(question: dict[str, Any]) -> int | None:
+    correct = [i for i, c in enumerate(question.get("choices") or []) if c.get("isCorrect")]
+    return correct[0] if len(correct) == 1 else None
+
+
+def item_difficulty(question: dict[str, Any]) -> float:
+    """Prior difficulty from a numeric value or an easy/medium/hard label; 0 when unknown."""
+    value = question.get("difficulty")
+    if isinstance(value, str):
+        return DIFFICULTY_LEVELS.get(value.strip().lower(), 0.0)
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _logit(p: float) -> float:
+    return math.log(p / (1.0 - p))
+
+
+def public_question(question: dict[str, Any]) -> dict[str, Any]:
+    """The question as served to a student: without the answer key or item parameters."""
+    return {
+        "id": question["id"],
+        "prompt": question.get("prompt", ""),
+        "choices": [{"id": c.get("id"), "text": c.get("text")} for c in question.get("choices") or []],
+        "hint": question.get("hint") or "",
+    }
+
+
+class ModuleItemBank:
+    """
+    Item parameters for one module in flat arrays.
+
+    For every item the log-probabilities of a correct and an incorrect answer are precomputed at
+    each grid point, so updating a student's posterior is a single pass of additions.
+    """
+
+    def __init__(self, module_id: str, course_id: str = DEFAULT_TENANT) -> None:
+        self.course_id = course_id
+        self.module_id = module_id
+        self.questions: list[dict[str, Any]] = []
+        self.discrimination = array("d")
+        self.difficulty = array("d")
+        self.guessing = array("d")
+        self.correct_choice = array("b")
+        self.prior_difficulty = array("d")
+        self.responses = array("l")
+        self.correct_responses = array("l")
+        self.log_p_correct = array("d")
+        self.log_p_incorrect = array("d")
+        self._prompts: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def add_question(
+        self,
+        question: dict[str, Any],
+        difficulty: float = 0.0,
+        discrimination: float = 1.0,
+        guessing: float = DEFAULT_GUESSING,
+    ) -> int | None:
+        correct = _correct_choice_index(question)
+        prompt_key = " ".join(str(question.get("prompt", "")).lower().split())
+        if correct is None or not prompt_key or prompt_key in self._prompts:
+            return None
+
+        index = len(self.questions)
+        item = dict(question)
+        item["id"] = f"{self.module_id}-{index + 1}"
+        self.questions.append(item)
+        self._prompts.add(prompt_key)
+        self.discrimination.append(discrimination)
+        self.difficulty.append(difficulty)
+        self.guessing.append(guessing)
+        self.correct_choice.append(correct)
+        self.prior_difficulty.append(difficulty)
+        self.responses.append(0)
+        self.correct_responses.append(0)
+        self.log_p_correct.extend([0.0] * _GRID_SIZE)
+        self.log_p_incorrect.extend([0.0] * _GRID_SIZE)
+        self._fill_log_tables(index)
+        return index
+
+    def _fill_log_tables(self, index: int) -> None:
+        offset = index * _GRID_SIZE
+        for g, theta in enumerate(THETA_GRID):
+            p = self.probability(index, theta)
+            self.log_p_correct[offset + g] = math.log(p)
+            self.log_p_incorrect[offset + g] = math.log(1.0 - p)
+
+    def record_response(self, index: int, correct: bool) -> None:
+        """
+        Recalibrate the item's difficulty from its observed proportion correct, blended with its
+        prior difficulty. Assumes student ability is roughly standard normal, under which an item
+        with difficulty b is answered correctly with probability c + (1 - c) * logistic(-a * b / s),
+        s = sqrt(1 + pi * a^2 / 8).
+        """
+        self.responses[index] += 1
+        if correct:
+            self.correct_responses[index] += 1
+        a = self.discrimination[index]
+        c = self.guessing[index]
+        scale = math.sqrt(1.0 + math.pi * a * a / 8.0)
+        prior_p = 1.0 / (1.0 + math.exp(a * self.prior_difficulty[index] / scale))
+        p = (self.correct_responses[index] + CALIBRATION_PRIOR_WEIGHT * (c + (1.0 - c) * prior_p)) / (
+            self.responses[index] + CALIBRATION_PRIOR_WEIGHT
+        )
+        p_above_guessing = min(max((p - c) / (1.0 - c), 0.02), 0.98)
+        self.difficulty[index] = min(max(-_logit(p_above_guessing) * scale / a, -3.0), 3.0)
+        self._fill_log_tables(index)
+
+    def probability(self, index: int, theta: float) -> float:
+        c = self.guessing[index]
+        logistic = 1.0 / (1.0 + math.exp(-self.discrimination[index] * (theta - self.difficulty[index])))
+        return c + (1.0 - c) * logistic
+
+    def information(self, index: int, theta: float) -> float:
+        """Fisher information of a 3PL item at theta."""
+        a = self.discrimination[index]
+        c = self.guessing[index]
+        p = self.probability(index, theta)
+        return (a * a) * ((p - c) ** 2) * (1.0 - p) / (((1.0 - c) ** 2) * p)
+
+    def index_of(self, question_id: str) -> int | None:
+        prefix = f"{self.module_id}-"
+        if not question_id.startswith(prefix):
+            return None
+        try:
+            index = int(question_id[len(prefix):]) - 1
+        except ValueError:
+            return None
+        return index if 0 <= index < len(self.questions) else None
+
+
+@dataclass
+class AdaptiveAttempt:
+    attempt_id: str
+    userid: str
+    course_id: str
+    module_id: str
+    max_questions: int
+    # Held by the attempt so it can finish even if the engine evicts the bank meanwhile.
+    bank: ModuleItemBank = field(repr=False)
+    log_posterior: list[float] = field(default_factory=lambda: list(_LOG_PRIOR))
+    administered: list[int] = field(default_factory=list)
+    responses: dict[int, bool] = field(default_factory=dict)
+    pending: int | None = None
+    theta: float = 0.0
+    standard_error: float = 1.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class AdaptiveQuizEngine:
+    """
+    Computerized adaptive testing over the module item banks.
+
+    Ability is an EAP estimate on a fixed grid, updated incrementally after every answer; the next
+    item is the unanswered one with maximum Fisher information at the current estimate.
+    """
+
+    def __init__(
+        self,
+        bank_dir: str | None = None,
+        target_standard_error: float | None = None,
+        max_attempts: int = 10000,
+        ttl_seconds: float = 4 * 3600,
+        max_banks: int | None = None,
+    ) -> None:
+        self.bank_dir = bank_dir if bank_dir is not None else os.getenv("QUESTION_BANK_DIR")
+        self.target_standard_error = target_standard_error or float(
+            os.getenv("ADAPTIVE_TARGET_SE", "0.3")
+        )
+        self.max_attempts = max_attempts
+        self.ttl_seconds = ttl_seconds
+        # Least recently used banks are dropped beyond max_banks, since module ids come from clients.
+        self.max_banks = max_banks or int(os.getenv("ADAPTIVE_MAX_BANKS", "64"))
+        self._banks: OrderedDict[tuple[str, str], ModuleItemBank] = OrderedDict()
+        self._attempts: OrderedDict[tuple[str, str], AdaptiveAttempt] = OrderedDict()
+
+    # -----------------------
+    # Item banks
+    # -----------------------
+
+    def bank(self, course_id: str, module_id: str) -> ModuleItemBank:
+        """The module's bank, created (and seeded from its bank file) if it isn't loaded."""
+        bank = self.find_bank(course_id, module_id)
+        if bank is None:
+            bank = ModuleItemBank(module_id, course_id)
+            self._keep(bank)
+        return bank
+
+    def find_bank(self, course_id: str, module_id: str) -> ModuleItemBank | None:
+        """The module's bank if it has questions; unknown modules don't leave an empty bank behind."""
+        key = (course_id, module_id)
+        bank = self._banks.get(key)
+        if bank is not None:
+            self._banks.move_to_end(key)
+            return bank
+        bank = ModuleItemBank(module_id, course_id)
+        self._load_bank_file(bank)
+        if not len(bank):
+            return None
+        self._keep(bank)
+        return bank
+
+    def _keep(self, bank: ModuleItemBank) -> None:
+        self._banks[(bank.course_id, bank.module_id)] = bank
+        while len(self._banks) > self.max_banks:
+            self._banks.popitem(last=False)
+
+    def register_questions(self, course_id: str, module_id: str, questions: list[dict[str, Any]]) -> int:
+        """Add validated questions (the /fetch/quiz shape) to a module's bank; returns how many were new."""
+        if not questions:
+            return 0
+        bank = self.bank(course_id, module_id)
+        added = 0
+        for question in questions:
+            if bank.add_question(
+                question,
+                difficulty=item_difficulty(question),
+                discrimination=float(question.get("discrimination", 1.0)),
+            ) is not None:
+                added += 1
+        return added
+
+    def _load_bank_file(self, bank: ModuleItemBank) -> None:
+        if not self.bank_dir:
+            return
+        # Files at the top of the directory belong to the default course, others to a course subdirectory.
+        directory = Path(self.bank_dir)
+        if bank.course_id != DEFAULT_TENANT:
+            directory = directory / bank.course_id
+        path = directory / f"module-{bank.module_id}.json"
+        if not path.is_file():
+            return
+        data = json.loads(path.read_text(encoding="utf-8"))
+        questions = data.get("questions", []) if isinstance(data, dict) else data
+        for question in questions:
+            if isinstance(question, dict):
+                bank.add_question(
+                    question,
+                    difficulty=item_difficulty(question),
+                    discrimination=float(question.get("discrimination", 1.0)),
+                )
+
+    # -----------------------
+    # Attempts
+    # -----------------------
+
+    def start_attempt(self, userid: str, course_id: str, module_id: str, max_questions: int) -> AdaptiveAttempt:
+        bank = self.find_bank(course_id, module_id)
+        if bank is None:
+            raise AdaptiveQuizError(
+                f"No questions available for module {module_id}; generate a quiz first.",
+                status_code=404,
+            )
+        self._evict_expired()
+        attempt = AdaptiveAttempt(
+            attempt_id=str(uuid4()),
+            userid=userid,
+            course_id=course_id,
+            module_id=module_id,
+            max_questions=max_questions,
+            bank=bank,
+        )
+        self._attempts[(userid, attempt.attempt_id)] = attempt
+        while len(self._attempts) > self.max_attempts:
+            self._attempts.popitem(last=False)
+        return attempt
+
+    def get_attempt(self, userid: str, attempt_id: str) -> AdaptiveAttempt:
+        attempt = self._attempts.get((userid, attempt_id))
+        if attempt is None:
+            raise AdaptiveQuizError("Unknown or expired adaptive quiz attempt.", status_code=404)
+        self._attempts.move_to_end((userid, attempt_id))
+        attempt.updated_at = time.monotonic()
+        return attempt
+
+    def record_answer(self, attempt: AdaptiveAttempt, question_id: str, choice_id: str) -> bool:
+        bank = attempt.bank
+        index = bank.index_of(question_id)
+        if index is None or index != attempt.pending:
+            raise AdaptiveQuizError("Answer does not match the pending question.", status_code=409)
+
+        choice_index = ord(choice_id.strip().upper()[:1] or "?") - ord("A")
+        correct = choice_index == bank.correct_choice[index]
+        table = bank.log_p_correct if correct else bank.log_p_incorrect
+        offset = index * _GRID_SIZE
+        posterior = attempt.log_posterior
+        for g in range(_GRID_SIZE):
+            posterior[g] += table[offset + g]
+
+        attempt.responses[index] = correct
+        attempt.pending = None
+        bank.record_response(index, correct)
+        attempt.theta, attempt.standard_error = self._estimate(posterior)
+        return correct
+
+    def next_question(self, attempt: AdaptiveAttempt) -> dict[str, Any] | None:
+        """
+        Pick the most informative unanswered item, or None when the attempt is finished. The
+        question is returned without its answer key, which stays server-side for scoring.
+        """
+        bank = attempt.bank
+        if attempt.pending is not None:
+            return public_question(bank.questions[attempt.pending])
+        if self.is_finished(attempt):
+            return None
+
+        answered = attempt.responses
+        theta = attempt.theta
+        best_index = -1
+        best_info = -1.0
+        for index in range(len(bank)):
+            if index in answered:
+                continue
+            info = bank.information(index, theta)
+            if info > best_info:
+                best_index, best_info = index, info
+        if best_index < 0:
+            return None
+
+        attempt.pending = best_index
+        attempt.administered.append(best_index)
+        return public_question(bank.questions[best_index])
+
+    def is_finished(self, attempt: AdaptiveAttempt) -> bool:
+        answered = len(attempt.responses)
+        if answered >= attempt.max_questions or answered >= len(attempt.bank):
+            return True
+        # Require a few answers before trusting the standard error.
+        return answered >= 3 and attempt.standard_error <= self.target_standard_error
+
+    @staticmethod
+    def _estimate(log_posterior: list[float]) -> tuple[float, float]:
+        peak = max(log_posterior)
+        weights = [math.exp(lp - peak) for lp in log_posterior]
+        total = sum(weights)
+        mean = sum(w * t for w, t in zip(weights, THETA_GRID)) / total
+        variance = sum(w * (t - mean) ** 2 for w, t in zip(weights, THETA_GRID)) / total
+        return mean, math.sqrt(variance)
+
+    def _evict_expired(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._attempts:
+            key, oldest = next(iter(self._attempts.items()))
+            if oldest.updated_at >= cutoff:
+                break
+            self._attempts.pop(key)
@@ -1,4 +1,9 @@
+import asyncio
+import copy
+import json
 import os
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import Any
 from uuid import uuid4
 
@@ -11,6 +16,46 @@ class CreateAIServiceError(Exception):
         self.status_code = status_code
 
 
+class UpstreamQuota:
+    """
+    Caps concurrent CreateAI calls. Callers beyond the cap wait, up to max_waiting of them;
+    further callers are rejected with a 429 rather than queued.
+    """
+
+    def __init__(self, max_concurrency: int, max_waiting: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self, label: str) -> AsyncIterator[None]:
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise CreateAIServiceError(f"CreateAI quota for {label} is exhausted; retry shortly.", status_code=429)
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def metrics(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
 class CreateAIService:
     def __init__(
         self,
@@ -21,6 +66,9 @@ class CreateAIService:
         model_name: str | None = None,
         project_id: str | None = None,
         timeout: float = 30.0,
+        client: httpx.AsyncClient | None = None,
+        quota: UpstreamQuota | None = None,
+        label: str = "default",
     ) -> None:
         self.api_url = api_url or os.getenv(
             "CREATEAI_API_URL",
@@ -35,6 +83,27 @@ class CreateAIService:
         self.model_name = model_name or os.getenv("CREATEAI_MODEL_NAME", "gpt4")
         self.project_id = project_id or os.getenv("CREATEAI_PROJECT_ID")
         self.timeout = timeout
+        # A shared, pooled client (owned by the caller) and concurrency quota, e.g. per tenant.
+        # Without a client each call opens its own connection.
+        self.client = client
+        self.quota = quota
+        self.label = label
+
+    def with_timeout(self, timeout: float) -> "CreateAIService":
+        """Same configuration, client and quota with a different request timeout."""
+        service = copy.copy(self)
+        service.timeout = timeout
+        return service
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[httpx.AsyncClient]:
+        quota = self.quota.slot(self.label) if self.quota is not None else _no_quota()
+        async with quota:
+            if self.client is not None:
+                yield self.client
+            else:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    yield client
 
     async def query(
         self,
@@ -70,10 +139,7 @@ class CreateAIService:
             extra_model_params=extra_model_params,
         )
 
-        headers = {
-            "Authorization": f"Bearer {self.api_token}",
-            "Content-Type": "application/json",
-        }
+        headers = self._headers()
 
         try:
             # Log request details for debugging
@@ -86,8 +152,8 @@ class CreateAIService:
             logger.info(f"CreateAI Query preview: {query_text[:200]}...")
             logger.info(f"CreateAI Timeout: {self.timeout}s")
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(self.api_url, json=payload, headers=headers)
+            async with self._session() as client:
+                response = await client.post(self.api_url, json=payload, headers=headers, timeout=self.timeout)
         except httpx.TimeoutException as exc:
             raise CreateAIServiceError(f"CreateAI request timed out after {self.timeout}s: {exc}") from exc
         except httpx.ConnectError as exc:
@@ -110,6 +176,75 @@ class CreateAIService:
         except ValueError as exc:
             raise CreateAIServiceError("CreateAI response was not valid JSON") from exc
 
+    async def open_stream(
+        self,
+        *,
+        prompt: str,
+        context: str | None = None,
+        system_prompt: str | None = None,
+        session_id: str | None = None,
+        temperature: float | None = None,
+        top_p: float | None = None,
+        top_k: int | None = None,
+        endpoint: str | None = None,
+        enable_search: bool | None = None,
+        search_params: dict | None = None,
+        extra_input: dict | None = None,
+        extra_model_params: dict | None = None,
+    ) -> "CreateAIStream":
+        """
+        Like query(), but asks CreateAI to stream. Returns once the upstream response has started
+        and its status was checked, so configuration and upstream errors raise here rather than
+        partway through the stream. The caller must read or aclose() the returned stream.
+        """
+        if not self.api_token:
+            raise CreateAIServiceError("CREATEAI_API_TOKEN environment variable is not set.")
+
+        payload = self._build_payload(
+            prompt=prompt,
+            context=context,
+            system_prompt=system_prompt,
+            session_id=session_id,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            endpoint=endpoint,
+            enable_search=enable_search,
+            search_params=endowed_search_params(search_params, self.project_id),
+            extra_input=extra_input,
+            extra_model_params=extra_model_params,
+        )
+        # extra_input can still override the streaming flag.
+        payload = {"stream": True} | payload
+
+        stack = AsyncExitStack()
+        try:
+            client = await stack.enter_async_context(self._session())
+            # The read timeout applies per chunk, so long answers are fine as long as tokens keep coming.
+            request = client.build_request(
+                "POST", self.api_url, json=payload, headers=self._headers(), timeout=self.timeout
+            )
+            response = await client.send(request, stream=True)
+            stack.push_async_callback(response.aclose)
+            if response.status_code >= 400:
+                detail = (await response.aread()).decode("utf-8", errors="replace")
+                raise CreateAIServiceError(
+                    f"CreateAI returned error {response.status_code}: {detail}",
+                    status_code=response.status_code,
+                )
+        except BaseException as exc:
+            await stack.aclose()
+            if isinstance(exc, httpx.RequestError):
+                raise _request_error(exc, self.timeout) from exc
+            raise
+        return CreateAIStream(response, stack, self.timeout)
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.api_token}",
+            "Content-Type": "application/json",
+        }
+
     def _build_payload(
         self,
         *,
@@ -161,6 +296,160 @@ class CreateAIService:
         return payload
 
 
+@asynccontextmanager
+async def _no_quota() -> AsyncIterator[None]:
+    yield
+
+
+def _request_error(exc: httpx.RequestError, timeout: float) -> CreateAIServiceError:
+    if isinstance(exc, httpx.TimeoutException):
+        return CreateAIServiceError(f"CreateAI request timed out after {timeout}s: {exc}")
+    if isinstance(exc, httpx.ConnectError):
+        return CreateAIServiceError(f"CreateAI connection failed. Check API URL and network: {exc}")
+    return CreateAIServiceError(f"CreateAI request failed: {exc}")
+
+
+class CreateAIStream:
+    """An opened upstream streaming response; text() yields the answer text as it arrives."""
+
+    def __init__(self, response: httpx.Response, stack: AsyncExitStack, timeout: float) -> None:
+        self._response = response
+        self._stack = stack
+        self._timeout = timeout
+
+    async def text(self) -> AsyncIterator[str]:
+        decoder = StreamTextDecoder()
+        try:
+            async for chunk in self._response.aiter_text():
+                for text in decoder.feed(chunk):
+                    yield text
+            for text in decoder.close():
+                yield text
+        except httpx.RequestError as exc:
+            raise _request_error(exc, self._timeout) from exc
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the upstream connection; safe to call more than once."""
+        await self._stack.aclose()
+
+
+# Keys that carry answer text in JSON stream frames, most specific first.
+_TEXT_KEYS = ("delta", "text", "content", "response", "chunk", "output")
+
+
+def frame_text(frame: Any) -> str:
+    """Answer text carried by one parsed JSON frame; empty for metadata-only frames."""
+    if isinstance(frame, str):
+        return frame
+    if isinstance(frame, list):
+        return "".join(frame_text(item) for item in frame)
+    if not isinstance(frame, dict):
+        return ""
+    for key in _TEXT_KEYS:
+        value = frame.get(key)
+        if isinstance(value, (str, dict, list)):
+            text = frame_text(value)
+            if text:
+                return text
+    # OpenAI-style frames: {"choices": [{"delta": {"content": ...}}]} or a full "message".
+    if isinstance(frame.get("choices"), list):
+        return "".join(frame_text(choice) for choice in frame["choices"])
+    for key in ("message", "result"):
+        if isinstance(frame.get(key), dict):
+            return frame_text(frame[key])
+    return ""
+
+
+class StreamTextDecoder:
+    """
+    Turns a streamed CreateAI body into answer text. The framing is detected from the first
+    bytes: server-sent events ("data:" lines, "[DONE]" ignored), newline-delimited JSON, a single
+    JSON document (only complete at the end of the body) or plain text passed through as is.
+    """
+
+    def __init__(self) -> None:
+        self.mode: str | None = None
+        self._buffer = ""
+        self._event_data: list[str] = []
+        self._emitted = False
+
+    def feed(self, chunk: str) -> list[str]:
+        self._buffer += chunk
+        if self.mode is None:
+            head = self._buffer.lstrip()
+            if not head:
+                return []
+            if head.startswith(("data:", "event:", "id:", "retry:", ":")):
+                self.mode = "sse"
+            elif head[0] in "{[":
+                self.mode = "ndjson"
+            else:
+                self.mode = "text"
+        if self.mode == "text":
+            text, self._buffer = self._buffer, ""
+            return [text] if text else []
+        if self.mode == "document":
+            return []
+        *lines, self._buffer = self._buffer.split("\n")
+        return self._emit(lines)
+
+    def close(self) -> list[str]:
+        remainder, self._buffer = self._buffer, ""
+        if self.mode == "document":
+            parsed = _parse_json(remainder)
+            return [text] if (text := frame_text(parsed) if parsed is not None else remainder) else []
+        texts = self._emit([remainder]) if remainder else []
+        if self.mode == "sse":
+            texts += self._emit([""])
+        return texts
+
+    def _emit(self, lines: list[str]) -> list[str]:
+        texts: list[str] = []
+        for i, line in enumerate(lines):
+            line = line.rstrip("\r")
+            if self.mode == "sse":
+                text = self._sse_line(line)
+            elif self.mode == "ndjson":
+                if not line.strip():
+                    continue
+                parsed = _parse_json(line)
+                if parsed is None and not self._emitted:
+                    # Not one JSON value per line: treat the whole body as a single document.
+                    self.mode = "document"
+                    self._buffer = "\n".join(lines[i:]) + "\n" + self._buffer
+                    return texts
+                text = frame_text(parsed) if parsed is not None else line
+            else:
+                text = line
+            if text:
+                texts.append(text)
+                self._emitted = True
+        return texts
+
+    def _sse_line(self, line: str) -> str:
+        if line.startswith("data:"):
+            data = line[5:]
+            self._event_data.append(data[1:] if data.startswith(" ") else data)
+            return ""
+        if line:
+            # event:, id:, retry: and comments carry no text
+            return ""
+        data, self._event_data = "\n".join(self._event_data), []
+        if not data or data.strip() == "[DONE]":
+            return ""
+        parsed = _parse_json(data)
+        return frame_text(parsed) if parsed is not None else data
+
+
+def _parse_json(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
 def endowed_search_params(request_params: dict | None, default_collection: str | None) -> dict | None:
     if request_params:
         return request_params
@@ -30,7 +30,8 @@ class AuthService:
         expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
         payload = {"sub": subject, "exp": expire}
         encoded = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
-        return Token(access_token=encoded)
+        # Set explicitly: ModelResponse omits fields left at their defaults.
+        return Token(access_token=encoded, token_type="bearer")
 
     def register_user(self, db: Session, userid: str, password: str) -> None:
         user = Users(userid=userid, hashed_password=self.hash_password(password))
@@ -0,0 +1,170 @@
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+
+# Rough chars-per-token ratio used for budgeting; CreateAI does not expose a tokenizer.
+CHARS_PER_TOKEN = 4
+# A turn (or context or summary section) cut down to less than this is not worth sending.
+MIN_TRUNCATED_TURN_TOKENS = 16
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max(max_chars - 3, 0)].rstrip() + "..."
+
+
+def _fit_to_tokens(text: str, max_tokens: int) -> str:
+    """text cut down to max_tokens, or "" if it would have to be cut below MIN_TRUNCATED_TURN_TOKENS."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens < MIN_TRUNCATED_TURN_TOKENS:
+        return ""
+    return _truncate_to_tokens(text, max_tokens)
+
+
+def _first_sentence(text: str, max_chars: int = 240) -> str:
+    text = " ".join(text.split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    if len(sentence) > max_chars:
+        sentence = sentence[: max_chars - 3].rstrip() + "..."
+    return sentence
+
+
+@dataclass
+class ConversationTurn:
+    role: str
+    text: str
+
+
+@dataclass
+class ConversationSession:
+    userid: str
+    session_id: str
+    summary: str = ""
+    turns: deque = field(default_factory=deque)
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class ConversationStore:
+    """
+    In-process tutor conversation memory keyed by (userid, session_id).
+
+    The most recent turns are kept verbatim; older turns are folded into a rolling
+    extractive summary so the context sent upstream stays within a fixed token budget.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int | None = None,
+        recent_turns: int | None = None,
+        token_budget: int | None = None,
+        summary_tokens: int | None = None,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        self.max_sessions = max_sessions or int(os.getenv("CONVERSATION_MAX_SESSIONS", "5000"))
+        self.recent_turns = recent_turns or int(os.getenv("CONVERSATION_RECENT_TURNS", "6"))
+        self.token_budget = token_budget or int(os.getenv("CONVERSATION_TOKEN_BUDGET", "3000"))
+        self.summary_tokens = summary_tokens or int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "400"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("CONVERSATION_TTL_SECONDS", "7200"))
+        self._sessions: OrderedDict[tuple[str, str], ConversationSession] = OrderedDict()
+
+    def get_or_create(self, userid: str, session_id: str | None, issued_only: bool = False) -> ConversationSession:
+        """
+        With issued_only, a session id this store didn't hand out is replaced by a fresh one, so
+        clients that share a namespace (anonymous users) can't pick each other's ids.
+        """
+        self._evict_expired()
+        if session_id and issued_only and (userid, session_id) not in self._sessions:
+            session_id = None
+        session_id = session_id or str(uuid4())
+        key = (userid, session_id)
+        session = self._sessions.get(key)
+        if session is None:
+            session = ConversationSession(userid=userid, session_id=session_id)
+            self._sessions[key] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(key)
+        session.updated_at = time.monotonic()
+        return session
+
+    def build_context(self, session: ConversationSession, prompt: str, context: str | None = None) -> str | None:
+        """
+        Assemble the context block for the next upstream request: rolling summary, then as many
+        recent turns as fit in the budget left after the prompt and any caller-supplied context.
+        A section that would have to be cut below MIN_TRUNCATED_TURN_TOKENS is left out.
+        """
+        remaining = self.token_budget - estimate_tokens(prompt)
+        sections: list[str] = []
+
+        if context:
+            context = _fit_to_tokens(context, max(remaining // 2, 0))
+            remaining -= estimate_tokens(context)
+
+        summary = ""
+        if session.summary:
+            summary = _fit_to_tokens(session.summary, max(min(self.summary_tokens, remaining), 0))
+            remaining -= estimate_tokens(summary)
+
+        recent: list[str] = []
+        for turn in reversed(session.turns):
+            line = f"{turn.role}: {turn.text}"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                # Keep the start of the newest turn that doesn't fit rather than dropping it.
+                line = _fit_to_tokens(line, max(remaining, 0))
+                if line:
+                    recent.append(line)
+                break
+            recent.append(line)
+            remaining -= cost
+        recent.reverse()
+
+        if summary:
+            sections.append(f"Conversation summary:\n{summary}")
+        if recent:
+            sections.append("Recent conversation:\n" + "\n".join(recent))
+        if context:
+            sections.append(context)
+        return "\n\n".join(sections) or None
+
+    def record(self, session: ConversationSession, prompt: str, answer: str) -> None:
+        session.turns.append(ConversationTurn(role="Student", text=prompt))
+        session.turns.append(ConversationTurn(role="Tutor", text=answer))
+        while len(session.turns) > self.recent_turns:
+            self._compact(session, session.turns.popleft())
+        session.updated_at = time.monotonic()
+
+    def _compact(self, session: ConversationSession, turn: ConversationTurn) -> None:
+        line = f"{turn.role}: {_first_sentence(turn.text)}"
+        summary = f"{session.summary}\n{line}" if session.summary else line
+        # Keep the newest summary lines when the summary outgrows its share of the budget.
+        max_chars = self.summary_tokens * CHARS_PER_TOKEN
+        if len(summary) > max_chars:
+            lines = summary.split("\n")
+            while len(lines) > 1 and sum(len(l) + 1 for l in lines) > max_chars:
+                lines.pop(0)
+            summary = "\n".join(lines)
+        session.summary = summary
+
+    def _evict_expired(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            key, oldest = next(iter(self._sessions.items()))
+            if oldest.updated_at >= cutoff:
+                break
+            self._sessions.pop(key)
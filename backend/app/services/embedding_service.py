@@ -0,0 +1,181 @@
+import asyncio
+import os
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Protocol
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9$]+")
+
+
+class Embedder(Protocol):
+    dimension: int
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Return a (len(texts), dimension) float32 array of L2-normalized embeddings."""
+
+
+def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    return matrix / norms
+
+
+class HashingEmbedder:
+    """
+    Model-free embeddings: signed feature hashing of word unigrams, bigrams and character
+    trigrams. Works offline with no model files and is good enough for near-duplicate detection
+    and lexical retrieval over course material.
+    """
+
+    def __init__(self, dimension: int = 512) -> None:
+        self.dimension = dimension
+
+    def _features(self, text: str) -> list[int]:
+        words = _TOKEN_RE.findall(text.lower())
+        features = [f"w:{w}" for w in words]
+        features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return [zlib.crc32(f.encode("utf-8")) for f in features]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        hashes = [np.asarray(self._features(t), dtype=np.uint32) for t in texts]
+        lengths = np.fromiter((len(h) for h in hashes), dtype=np.int64, count=len(hashes))
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if lengths.sum():
+            flat = np.concatenate(hashes)
+            rows = np.repeat(np.arange(len(texts)), lengths)
+            cols = (flat % self.dimension).astype(np.int64)
+            # Top hash bit picks the sign so collisions cancel out on average.
+            signs = np.where(flat >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix, (rows, cols), signs)
+        return _l2_normalize(matrix)
+
+
+class OnnxEmbedder:
+    """Sentence-transformer style ONNX model with mean pooling, run on CPU."""
+
+    def __init__(self, model_path: str, tokenizer_path: str, max_length: int = 256) -> None:
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = int(os.getenv("EMBEDDING_THREADS", "1"))
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, feeds)[0]
+        mask = attention[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return _l2_normalize(pooled.astype(np.float32))
+
+
+def default_embedder() -> Embedder:
+    model_path = os.getenv("EMBEDDING_ONNX_MODEL")
+    tokenizer_path = os.getenv("EMBEDDING_TOKENIZER")
+    if model_path and tokenizer_path:
+        return OnnxEmbedder(model_path, tokenizer_path)
+    return HashingEmbedder(dimension=int(os.getenv("EMBEDDING_DIMENSION", "512")))
+
+
+class EmbeddingService:
+    """
+    Collects concurrent embed() calls into micro-batches and runs each batch as one vectorized
+    pass on a worker pool. A batch is dispatched when it reaches max_batch_size or max_wait_ms
+    after its first request, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder | None = None,
+        max_batch_size: int | None = None,
+        max_wait_ms: float | None = None,
+        workers: int | None = None,
+    ) -> None:
+        self.embedder = embedder or default_embedder()
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))) / 1000.0
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or int(os.getenv("EMBEDDING_WORKERS", "1")),
+            thread_name_prefix="embedding",
+        )
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # The loop only keeps weak references to tasks, so in-flight batches are held here.
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def dimension(self) -> int:
+        return self.embedder.dimension
+
+    async def embed(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    async def embed_many(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.stack(await asyncio.gather(*(self.embed(t) for t in texts)))
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending[: self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        # Callers that were cancelled while waiting don't need their text embedded.
+        batch = [(text, future) for text, future in batch if not future.cancelled()]
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(self.executor, self.embedder.embed, texts)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_embedding_service: EmbeddingService | None = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Process-wide service, created on first use so the model is only loaded when needed."""
+    global _embedding_service
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService()
+    return _embedding_service
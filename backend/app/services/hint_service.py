@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any
+
+
+class HintGenerationInterrupted(Exception):
+    pass
+
+
+def hint_cache_key(course_id: str, kind: str, question: dict[str, Any]) -> str:
+    """Content key: the same question text and choices share hints across a course's quizzes and ids."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(course_id.encode("utf-8") + b"\0" + kind.encode("utf-8"))
+    digest.update(b"\0" + str(question.get("prompt", "")).strip().encode("utf-8"))
+    for choice in question.get("choices") or []:
+        digest.update(b"\0" + str(choice.get("text", "")).strip().encode("utf-8"))
+        digest.update(b"\1" if choice.get("isCorrect") else b"\2")
+    return digest.hexdigest()
+
+
+class HintCache:
+    """
+    LRU cache of generated hints and explanations keyed by question content.
+
+    Keys being generated are tracked as in-flight futures, so concurrent requests for the same
+    question wait for one upstream call instead of each making their own.
+    """
+
+    def __init__(self, max_entries: int | None = None) -> None:
+        self.max_entries = max_entries or int(os.getenv("HINT_CACHE_MAX_ENTRIES", "20000"))
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    def get(self, key: str) -> str | None:
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+        return text
+
+    def in_flight(self, key: str) -> asyncio.Future | None:
+        return self._in_flight.get(key)
+
+    def claim(self, key: str) -> None:
+        """Mark key as being generated by the caller, who must later resolve() or fail() it."""
+        self._in_flight[key] = asyncio.get_running_loop().create_future()
+
+    def resolve(self, key: str, text: str | None) -> None:
+        if text:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(text)
+
+    def fail(self, key: str, exc: BaseException) -> None:
+        future = self._in_flight.pop(key, None)
+        if future is None or future.done():
+            return
+        if isinstance(exc, asyncio.CancelledError):
+            # The generating request went away; waiters should not be cancelled with it.
+            exc = HintGenerationInterrupted("Hint generation was interrupted; please retry.")
+        future.set_exception(exc)
+        # Waiters re-raise it; don't warn about an unretrieved exception if there are none.
+        future.exception()
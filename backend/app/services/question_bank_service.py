@@ -0,0 +1,143 @@
+import os
+import random
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.domain_models import BankQuestion, PregenerationCheckpoint
+
+
+def _in_module(course_id: str, module_id: str):
+    return (BankQuestion.course_id == course_id) & (BankQuestion.module_id == module_id)
+
+
+class QuestionBankService:
+    """Pre-generated questions, banked per course and module."""
+
+    def __init__(self, min_questions: int | None = None) -> None:
+        # Only serve from the bank once a module has enough questions for quizzes to vary.
+        self.min_questions = min_questions or int(os.getenv("QUIZ_BANK_MIN_QUESTIONS", "30"))
+
+    def count(self, db: Session, course_id: str, module_id: str) -> int:
+        return db.execute(
+            select(func.count()).select_from(BankQuestion).where(_in_module(course_id, module_id))
+        ).scalar_one()
+
+    def _unbanked(
+        self, db: Session, course_id: str, module_id: str, questions: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Drop questions whose prompt is already banked for the module (or repeated in questions)."""
+        prompts = {question["prompt"] for question in questions}
+        seen = set(db.execute(
+            select(BankQuestion.prompt).where(_in_module(course_id, module_id), BankQuestion.prompt.in_(prompts))
+        ).scalars())
+        unbanked = []
+        for question in questions:
+            if question["prompt"] not in seen:
+                seen.add(question["prompt"])
+                unbanked.append(question)
+        return unbanked
+
+    def save_questions(self, db: Session, course_id: str, module_id: str, questions: list[dict[str, Any]]) -> int:
+        """Bank questions not already in the module; returns how many were added."""
+        questions = self._unbanked(db, course_id, module_id, questions)
+        for question in questions:
+            db.add(BankQuestion(
+                course_id=course_id, module_id=module_id, prompt=question["prompt"], question=dict(question)
+            ))
+        db.commit()
+        return len(questions)
+
+    def load_module(
+        self, db: Session, course_id: str, module_id: str, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """The module's questions oldest first; with limit, only the newest limit of them."""
+        rows = db.execute(
+            select(BankQuestion.question)
+            .where(_in_module(course_id, module_id))
+            .order_by(BankQuestion.id.desc())
+            .limit(limit)
+        ).scalars()
+        return [dict(question) for question in reversed(rows.all())]
+
+    def load_all(self, db: Session) -> dict[tuple[str, str], list[dict[str, Any]]]:
+        """Every banked question, keyed by (course_id, module_id)."""
+        modules: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        rows = db.execute(
+            select(BankQuestion.course_id, BankQuestion.module_id, BankQuestion.question)
+            .order_by(BankQuestion.course_id, BankQuestion.module_id, BankQuestion.id)
+        )
+        for course_id, module_id, question in rows:
+            modules.setdefault((course_id, module_id), []).append(dict(question))
+        return modules
+
+    def sample_quiz(
+        self, db: Session, course_id: str, module_id: str, num_questions: int
+    ) -> list[dict[str, Any]] | None:
+        """Random questions from the bank, or None if the module is not warm enough to serve from."""
+        total = self.count(db, course_id, module_id)
+        if total < max(self.min_questions, num_questions):
+            return None
+        ids = db.execute(select(BankQuestion.id).where(_in_module(course_id, module_id))).scalars().all()
+        chosen = random.sample(ids, num_questions)
+        rows = db.execute(select(BankQuestion.question).where(BankQuestion.id.in_(chosen))).scalars()
+        questions = [dict(question) for question in rows]
+        random.shuffle(questions)
+        return questions
+
+    # -----------------------
+    # Pre-generation checkpoints
+    # -----------------------
+
+    def get_checkpoint(
+        self, db: Session, run_id: str, course_id: str, module_id: str, target: int
+    ) -> PregenerationCheckpoint:
+        checkpoint = db.execute(
+            select(PregenerationCheckpoint).where(
+                PregenerationCheckpoint.run_id == run_id,
+                PregenerationCheckpoint.course_id == course_id,
+                PregenerationCheckpoint.module_id == module_id,
+            )
+        ).scalar_one_or_none()
+        if checkpoint is None:
+            checkpoint = PregenerationCheckpoint(
+                run_id=run_id, course_id=course_id, module_id=module_id, target=target, generated=0
+            )
+            db.add(checkpoint)
+            db.commit()
+        return checkpoint
+
+    def save_batch(
+        self,
+        db: Session,
+        checkpoint: PregenerationCheckpoint,
+        questions: list[dict[str, Any]],
+    ) -> None:
+        """
+        Store a generated batch and advance the checkpoint in the same transaction. The run is done
+        once the module's bank holds checkpoint.target questions.
+        """
+        questions = self._unbanked(db, checkpoint.course_id, checkpoint.module_id, questions)
+        for question in questions:
+            db.add(BankQuestion(
+                course_id=checkpoint.course_id,
+                module_id=checkpoint.module_id,
+                prompt=question["prompt"],
+                question=dict(question),
+            ))
+        checkpoint.generated += len(questions)
+        banked = self.count(db, checkpoint.course_id, checkpoint.module_id)
+        checkpoint.status = "done" if banked >= checkpoint.target else "running"
+        checkpoint.error = None
+        db.commit()
+
+    def mark_done(self, db: Session, checkpoint: PregenerationCheckpoint) -> None:
+        checkpoint.status = "done"
+        checkpoint.error = None
+        db.commit()
+
+    def mark_failed(self, db: Session, checkpoint: PregenerationCheckpoint, error: str) -> None:
+        checkpoint.status = "failed"
+        checkpoint.error = error[:1000]
+        db.commit()
@@ -0,0 +1,218 @@
+import os
+import random
+import re
+import unicodedata
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Any
+
+import numpy as np
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"[a-z0-9$]+")
+
+
+def normalize_question_text(text: str) -> str:
+    """Lowercase, strip accents/punctuation and collapse whitespace so cosmetic edits don't matter."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(_WORD_RE.findall(text))
+
+
+def question_fingerprint_text(question: dict[str, Any]) -> str:
+    """Text used for similarity: the prompt plus the choice texts in sorted order."""
+    choices = question.get("choices") or []
+    choice_texts = sorted(str(c.get("text", "")) for c in choices if isinstance(c, dict))
+    return " ".join([str(question.get("prompt", ""))] + choice_texts)
+
+
+def _shingles(normalized: str, size: int) -> set[int]:
+    words = normalized.split()
+    if len(words) < size:
+        return {zlib.crc32(normalized.encode("utf-8"))} if normalized else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """MinHash signatures over word shingles using seeded universal hashing (stable across processes)."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 230) -> None:
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        shingles = _shingles(normalize_question_text(text), self.shingle_size)
+        if not shingles:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self._perms
+        )
+
+    @staticmethod
+    def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+        matches = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+        return matches / len(sig_a)
+
+
+class QuestionIndex:
+    """
+    Near-duplicate index for quiz questions.
+
+    Signatures are bucketed with LSH banding so a lookup only compares against candidates that
+    share at least one band, then confirms with the estimated Jaccard similarity. Entries added
+    with an embedding are also compared by cosine similarity, which catches reordered and
+    reworded questions that share few word shingles.
+    """
+
+    def __init__(
+        self,
+        hasher: MinHasher | None = None,
+        threshold: float | None = None,
+        bands: int = 16,
+        max_entries: int | None = None,
+        semantic_threshold: float | None = None,
+    ) -> None:
+        self.hasher = hasher or MinHasher()
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv("QUESTION_SIMILARITY_THRESHOLD", "0.7")
+        )
+        self.semantic_threshold = semantic_threshold if semantic_threshold is not None else float(
+            os.getenv("QUESTION_SEMANTIC_THRESHOLD", "0.95")
+        )
+        if self.hasher.num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+        self.max_entries = max_entries
+        self._exact: dict[str, int] = {}
+        self._texts: dict[int, str] = {}
+        self._signatures: OrderedDict[int, tuple[int, ...]] = OrderedDict()
+        self._buckets: defaultdict[tuple[int, tuple[int, ...]], set[int]] = defaultdict(set)
+        self._vectors: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._matrix: np.ndarray | None = None
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: tuple[int, ...]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def _embedding_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.stack(list(self._vectors.values()))
+        return self._matrix
+
+    def find_duplicate(
+        self, text: str, signature: tuple[int, ...] | None = None, vector: np.ndarray | None = None
+    ) -> bool:
+        if normalize_question_text(text) in self._exact:
+            return True
+        if vector is not None and self._vectors:
+            if float(np.max(self._embedding_matrix() @ vector)) >= self.semantic_threshold:
+                return True
+        signature = signature or self.hasher.signature(text)
+        seen: set[int] = set()
+        for key in self._band_keys(signature):
+            for entry_id in self._buckets.get(key, ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                if self.hasher.similarity(signature, self._signatures[entry_id]) >= self.threshold:
+                    return True
+        return False
+
+    def add(self, text: str, signature: tuple[int, ...] | None = None, vector: np.ndarray | None = None) -> None:
+        """Index text; vector is its L2-normalized embedding, if semantic matching is wanted."""
+        signature = signature or self.hasher.signature(text)
+        entry_id = self._next_id
+        self._next_id += 1
+        if vector is not None:
+            self._vectors[entry_id] = vector
+            self._matrix = None
+        normalized = normalize_question_text(text)
+        self._exact[normalized] = entry_id
+        self._texts[entry_id] = normalized
+        self._signatures[entry_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets[key].add(entry_id)
+        if self.max_entries is not None and len(self._signatures) > self.max_entries:
+            self._remove_oldest()
+
+    def add_if_new(self, text: str, vector: np.ndarray | None = None) -> bool:
+        """Add text unless it is a near-duplicate of something already indexed; return True if added."""
+        signature = self.hasher.signature(text)
+        if self.find_duplicate(text, signature, vector):
+            return False
+        self.add(text, signature, vector)
+        return True
+
+    def _remove_oldest(self) -> None:
+        entry_id, signature = self._signatures.popitem(last=False)
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+        normalized = self._texts.pop(entry_id)
+        if self._exact.get(normalized) == entry_id:
+            del self._exact[normalized]
+        if self._vectors.pop(entry_id, None) is not None:
+            self._matrix = None
+
+
+class ModuleQuestionHistory:
+    """
+    Per-module indexes of questions already served, keyed by (course_id, module_id) and shared
+    across requests in this process. Callers seed a module from the question bank before first
+    use, so the history survives restarts and is the same in every worker. At most max_modules
+    indexes are kept (least recently used are dropped and re-seeded when needed again), since
+    module ids come from clients.
+    """
+
+    def __init__(self, max_entries_per_module: int | None = None, max_modules: int | None = None) -> None:
+        self.max_entries_per_module = max_entries_per_module or int(
+            os.getenv("QUESTION_HISTORY_PER_MODULE", "2000")
+        )
+        self.max_modules = max_modules or int(os.getenv("QUESTION_HISTORY_MAX_MODULES", "64"))
+        self.hasher = MinHasher()
+        self._indexes: OrderedDict[tuple[str, str], QuestionIndex] = OrderedDict()
+
+    def is_seeded(self, module: tuple[str, str]) -> bool:
+        return module in self._indexes
+
+    def seed(self, module: tuple[str, str], fingerprints: list[str], vectors: np.ndarray | None = None) -> QuestionIndex:
+        """Create the module's index from already-stored questions, unless it already exists."""
+        index = self._indexes.get(module)
+        if index is None:
+            index = QuestionIndex(hasher=self.hasher, max_entries=self.max_entries_per_module)
+            for i, text in enumerate(fingerprints):
+                index.add(text, vector=vectors[i] if vectors is not None else None)
+            self._indexes[module] = index
+            while len(self._indexes) > self.max_modules:
+                self._indexes.popitem(last=False)
+        return index
+
+    def index_for(self, module: tuple[str, str]) -> QuestionIndex:
+        index = self._indexes.get(module)
+        if index is None:
+            return self.seed(module, [])
+        self._indexes.move_to_end(module)
+        return index
+
+    def new_quiz_index(self) -> QuestionIndex:
+        return QuestionIndex(hasher=self.hasher)
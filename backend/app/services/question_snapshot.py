@@ -0,0 +1,175 @@
+import logging
+import mmap
+import os
+import random
+import struct
+import time
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+
+# Snapshot layout (little-endian):
+#   header   magic "QBS1", format version, flags, snapshot version, module count, question count,
+#            and the byte offsets of the module table, question index and data section
+#   modules  per course module: course id and module id (offset/length into data), first question
+#            index, question count
+#   index    per question: record offset into data, record length, correct choice index
+#   data     id strings and one compact JSON record per question (the /fetch/quiz shape)
+MAGIC = b"QBS1"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("<4sHHQIIQQQ")
+_MODULE = struct.Struct("<QIQIII")
+_INDEX = struct.Struct("<QIB3x")
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotFormatError(Exception):
+    pass
+
+
+def write_snapshot(
+    path: str | Path, modules: dict[tuple[str, str], list[dict[str, Any]]], version: int | None = None
+) -> int:
+    """
+    Write a snapshot of questions keyed by (course_id, module_id) and atomically publish it at
+    path (write to a temp file, fsync, rename).
+    Readers that already mapped the previous file keep using it until they notice the swap.
+    Returns the snapshot version.
+    """
+    path = Path(path)
+    version = version if version is not None else time.time_ns() // 1_000_000
+    data = bytearray()
+    module_entries = []
+    index_entries = []
+
+    for (course_id, module_id), questions in sorted(modules.items()):
+        encoded_course = course_id.encode("utf-8")
+        course_offset = len(data)
+        data += encoded_course
+        encoded_id = module_id.encode("utf-8")
+        id_offset = len(data)
+        data += encoded_id
+        first = len(index_entries)
+        for question in questions:
+            correct = next((i for i, c in enumerate(question.get("choices", [])) if c.get("isCorrect")), 0)
+            record = orjson.dumps(question)
+            index_entries.append((len(data), len(record), correct))
+            data += record
+        module_entries.append((
+            course_offset, len(encoded_course), id_offset, len(encoded_id), first, len(index_entries) - first
+        ))
+
+    modules_offset = _HEADER.size
+    index_offset = modules_offset + _MODULE.size * len(module_entries)
+    data_offset = index_offset + _INDEX.size * len(index_entries)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(
+            MAGIC, FORMAT_VERSION, 0, version, len(module_entries), len(index_entries),
+            modules_offset, index_offset, data_offset,
+        ))
+        for entry in module_entries:
+            f.write(_MODULE.pack(*entry))
+        for entry in index_entries:
+            f.write(_INDEX.pack(*entry))
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return version
+
+
+class QuestionSnapshot:
+    """A read-only, memory-mapped snapshot. Pages are shared by every worker mapping the same file."""
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm.size() < _HEADER.size:
+            raise SnapshotFormatError(f"{path} is too small to be a question snapshot")
+        (
+            magic, format_version, _flags, self.version, n_modules, self.question_count,
+            modules_offset, self._index_offset, self._data_offset,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise SnapshotFormatError(f"{path} is not a version {FORMAT_VERSION} question snapshot")
+
+        self._modules: dict[tuple[str, str], tuple[int, int]] = {}
+        for i in range(n_modules):
+            course_offset, course_len, id_offset, id_len, first, count = _MODULE.unpack_from(
+                self._mm, modules_offset + i * _MODULE.size
+            )
+            self._modules[(self._string(course_offset, course_len), self._string(id_offset, id_len))] = (first, count)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._data_offset + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def module_count(self, course_id: str, module_id: str) -> int:
+        return self._modules.get((course_id, module_id), (0, 0))[1]
+
+    def question(self, index: int) -> dict[str, Any]:
+        offset, length, _correct = _INDEX.unpack_from(self._mm, self._index_offset + index * _INDEX.size)
+        start = self._data_offset + offset
+        return orjson.loads(memoryview(self._mm)[start:start + length])
+
+    def module_questions(self, course_id: str, module_id: str) -> list[dict[str, Any]]:
+        first, count = self._modules.get((course_id, module_id), (0, 0))
+        return [self.question(i) for i in range(first, first + count)]
+
+    def sample(self, course_id: str, module_id: str, num_questions: int) -> list[dict[str, Any]]:
+        first, count = self._modules.get((course_id, module_id), (0, 0))
+        return [self.question(i) for i in random.sample(range(first, first + count), min(num_questions, count))]
+
+
+class SnapshotReader:
+    """
+    Holds the current snapshot for a path and swaps to a newly published one. The file identity
+    is checked at most every check_interval seconds, so the hot path is a clock read.
+    """
+
+    def __init__(self, path: str | None = None, check_interval: float = 1.0) -> None:
+        self.path = path if path is not None else os.getenv("QUESTION_SNAPSHOT_PATH")
+        self.check_interval = check_interval
+        self._snapshot: QuestionSnapshot | None = None
+        self._identity: tuple[int, int] | None = None
+        self._checked_at = float("-inf")
+
+    def current(self) -> QuestionSnapshot | None:
+        if not self.path:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._snapshot
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._snapshot, self._identity = None, None
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        if identity != self._identity:
+            try:
+                snapshot = QuestionSnapshot(self.path)
+            except (OSError, ValueError, SnapshotFormatError) as exc:
+                # Keep serving the previous snapshot rather than failing requests.
+                logger.warning("Could not load question snapshot %s: %s", self.path, exc)
+                return self._snapshot
+            # The old mapping is released once no caller holds a reference to it.
+            self._snapshot = snapshot
+            self._identity = identity
+        return self._snapshot
+
+    def sample(
+        self, course_id: str, module_id: str, num_questions: int, min_questions: int = 0
+    ) -> list[dict[str, Any]] | None:
+        """Random questions from the snapshot, or None if it can't serve this course module."""
+        snapshot = self.current()
+        if snapshot is None or snapshot.module_count(course_id, module_id) < max(num_questions, min_questions):
+            return None
+        return snapshot.sample(course_id, module_id, num_questions)
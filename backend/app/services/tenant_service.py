@@ -0,0 +1,145 @@
+import json
+import os
+from dataclasses import dataclass, fields
+from typing import Any
+
+import httpx
+from fastapi import Header, HTTPException, Query, status
+
+from app.services.ai_service import CreateAIService, UpstreamQuota
+
+
+DEFAULT_TENANT = "default"
+DEFAULT_COURSE_NAME = "CSE 230 Assembly Language Programming"
+
+
+@dataclass(frozen=True)
+class TenantConfig:
+    """
+    CreateAI settings for one course. Unset fields fall back to the CREATEAI_* environment
+    variables; api_token_env names an environment variable holding the token, so tenant files
+    don't have to contain secrets.
+    """
+
+    course_id: str
+    # Course title used in quiz and hint prompts; defaults to the course id.
+    course_name: str | None = None
+    api_url: str | None = None
+    api_token: str | None = None
+    api_token_env: str | None = None
+    model_provider: str | None = None
+    model_name: str | None = None
+    # Default search collection for retrieval.
+    project_id: str | None = None
+    system_prompt: str | None = None
+    max_concurrency: int = 8
+    max_waiting: int = 16
+
+    @classmethod
+    def from_dict(cls, course_id: str, data: dict[str, Any]) -> "TenantConfig":
+        known = {f.name for f in fields(cls)} - {"course_id"}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown settings for course {course_id}: {', '.join(sorted(unknown))}")
+        config = cls(course_id=course_id, **data)
+        if not config.api_token and config.api_token_env and not os.getenv(config.api_token_env):
+            # Falling back to the shared token would bill this course's calls to another course.
+            raise ValueError(f"Course {course_id}: environment variable {config.api_token_env} is not set")
+        return config
+
+    @property
+    def title(self) -> str:
+        return self.course_name or self.course_id
+
+    def token(self) -> str | None:
+        if self.api_token:
+            return self.api_token
+        if self.api_token_env:
+            return os.getenv(self.api_token_env)
+        return None
+
+
+class Tenant:
+    """A course's CreateAI service with its own connection pool and concurrency quota."""
+
+    def __init__(self, config: TenantConfig) -> None:
+        self.config = config
+        self.course_id = config.course_id
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.max_concurrency,
+                max_keepalive_connections=config.max_concurrency,
+            ),
+        )
+        self.quota = UpstreamQuota(config.max_concurrency, config.max_waiting)
+        self.service = CreateAIService(
+            api_url=config.api_url,
+            api_token=config.token(),
+            default_system_prompt=config.system_prompt,
+            model_provider=config.model_provider,
+            model_name=config.model_name,
+            project_id=config.project_id,
+            client=self.client,
+            quota=self.quota,
+            label=f"course {config.course_id}",
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def load_tenant_configs() -> list[TenantConfig]:
+    """
+    Tenants from CREATEAI_TENANTS_FILE (a JSON file) or CREATEAI_TENANTS (inline JSON), both
+    mapping course id to settings. The "default" tenant serves requests without a course id and
+    is built from the environment unless configured explicitly.
+    """
+    path = os.getenv("CREATEAI_TENANTS_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+    else:
+        raw = json.loads(os.getenv("CREATEAI_TENANTS") or "{}")
+    if not isinstance(raw, dict):
+        raise ValueError("CreateAI tenant configuration must be a JSON object keyed by course id")
+
+    configs = [TenantConfig.from_dict(str(course_id), settings or {}) for course_id, settings in raw.items()]
+    if DEFAULT_TENANT not in raw:
+        configs.append(TenantConfig(
+            course_id=DEFAULT_TENANT,
+            course_name=os.getenv("COURSE_NAME", DEFAULT_COURSE_NAME),
+            max_concurrency=int(os.getenv("CREATEAI_MAX_CONCURRENCY", "8")),
+            max_waiting=int(os.getenv("CREATEAI_MAX_WAITING", "16")),
+        ))
+    return configs
+
+
+class TenantRegistry:
+    def __init__(self, configs: list[TenantConfig] | None = None) -> None:
+        configs = configs if configs is not None else load_tenant_configs()
+        self._tenants = {config.course_id: Tenant(config) for config in configs}
+
+    def get(self, course_id: str | None) -> Tenant | None:
+        return self._tenants.get(course_id or DEFAULT_TENANT)
+
+    def metrics(self) -> dict:
+        return {course_id: tenant.quota.metrics() for course_id, tenant in self._tenants.items()}
+
+    async def aclose(self) -> None:
+        for tenant in self._tenants.values():
+            await tenant.aclose()
+
+
+tenant_registry = TenantRegistry()
+
+
+def get_tenant(
+    x_course_id: str | None = Header(default=None),
+    course_id: str | None = Query(default=None),
+) -> Tenant:
+    """Resolve the request's course from the X-Course-Id header or the course_id query parameter."""
+    requested = x_course_id or course_id
+    tenant = tenant_registry.get(requested)
+    if tenant is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown course: {requested}")
+    return tenant
@@ -0,0 +1,252 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+@dataclass(frozen=True)
+class AdmissionClass:
+    name: str
+    # Lower values are admitted first when slots free up.
+    priority: int
+    # Cap on this class's share of the global slots; None means only the global limit applies.
+    max_concurrency: int | None = None
+    # Queueing delay above which new arrivals that would have to wait are shed. None never sheds early.
+    target_delay: float | None = None
+    max_queue: int = 100
+    max_wait: float = 10.0
+    retry_after: int = 1
+
+
+@dataclass(frozen=True)
+class AdmissionRule:
+    prefix: str
+    admission_class: str
+
+
+def default_admission_classes() -> tuple[AdmissionClass, ...]:
+    target = float(os.getenv("ADMISSION_TARGET_DELAY_MS", "500")) / 1000.0
+    return (
+        AdmissionClass("critical", priority=0),
+        AdmissionClass("serve", priority=1, target_delay=target * 4, retry_after=1),
+        AdmissionClass(
+            "generate",
+            priority=2,
+            max_concurrency=int(os.getenv("ADMISSION_GENERATE_CONCURRENCY", "16")),
+            target_delay=target,
+            retry_after=5,
+        ),
+    )
+
+
+# First matching prefix wins; unmatched paths (health, docs, debug) are not gated. /fetch/quiz and
+# /fetch/quiz/hints take a "generate" slot in the handler, and only when they have to call CreateAI,
+# so quizzes served from the bank and cached hints are never queued behind live generation.
+DEFAULT_ADMISSION_RULES: tuple[AdmissionRule, ...] = (
+    AdmissionRule("/auth", "critical"),
+    AdmissionRule("/fetch/quiz/next", "serve"),
+    AdmissionRule("/fetch/query", "generate"),
+)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, admission_class: str, retry_after: int) -> None:
+        super().__init__(f"Server is overloaded ({admission_class} requests); retry in {retry_after}s.")
+        self.admission_class = admission_class
+        self.retry_after = retry_after
+
+
+@dataclass
+class _ClassState:
+    in_flight: int = 0
+    waiters: deque = field(default_factory=deque)
+    admitted: int = 0
+    shed: int = 0
+    # Minimum queueing delay seen in the current interval (CoDel style): if even the luckiest
+    # request of a whole interval waited longer than the target, the queue is standing, not a burst.
+    interval_start: float = 0.0
+    interval_min_delay: float | None = None
+    standing_delay: float = 0.0
+    last_delay: float = 0.0
+
+
+class AdmissionController:
+    """
+    Admission control over a shared pool of request slots. Waiting requests are queued per class
+    and woken in priority order; a lower-priority class whose queueing delay stays above its
+    target sheds new arrivals with AdmissionRejected instead of letting them queue until the
+    client times out.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        classes: tuple[AdmissionClass, ...] | None = None,
+        interval: float | None = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency or int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))
+        self.interval = interval if interval is not None else float(os.getenv("ADMISSION_INTERVAL_MS", "1000")) / 1000.0
+        classes = classes or default_admission_classes()
+        self.classes = {c.name: c for c in classes}
+        self._by_priority = sorted(classes, key=lambda c: c.priority)
+        self._state = {c.name: _ClassState() for c in classes}
+        self._in_flight = 0
+
+    def _has_capacity(self, cls: AdmissionClass) -> bool:
+        if self._in_flight >= self.max_concurrency:
+            return False
+        return cls.max_concurrency is None or self._state[cls.name].in_flight < cls.max_concurrency
+
+    def _record_delay(self, state: _ClassState, delay: float, now: float) -> None:
+        state.last_delay = delay
+        if now - state.interval_start >= self.interval:
+            if state.interval_min_delay is not None:
+                state.standing_delay = state.interval_min_delay
+            state.interval_start = now
+            state.interval_min_delay = delay
+        else:
+            state.interval_min_delay = delay if state.interval_min_delay is None else min(state.interval_min_delay, delay)
+
+    def _overloaded(self, cls: AdmissionClass, now: float) -> bool:
+        if cls.target_delay is None:
+            return False
+        state = self._state[cls.name]
+        if state.standing_delay > cls.target_delay and now - state.interval_start < 2 * self.interval:
+            return True
+        # Nothing is being admitted while the queue is stuck, so also look at the oldest waiter.
+        return bool(state.waiters) and now - state.waiters[0][0] > cls.target_delay
+
+    def _grant(self, name: str, delay: float, now: float) -> None:
+        state = self._state[name]
+        state.in_flight += 1
+        state.admitted += 1
+        self._in_flight += 1
+        self._record_delay(state, delay, now)
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        for cls in self._by_priority:
+            waiters = self._state[cls.name].waiters
+            while waiters and self._has_capacity(cls):
+                enqueued_at, future = waiters.popleft()
+                if future.done():
+                    continue
+                self._grant(cls.name, now - enqueued_at, now)
+                future.set_result(None)
+            if waiters and self._in_flight >= self.max_concurrency:
+                # Lower priorities wait until this class's queue drains.
+                return
+
+    async def acquire(self, name: str) -> None:
+        cls = self.classes[name]
+        state = self._state[name]
+        now = time.monotonic()
+        queued_ahead = any(self._state[c.name].waiters for c in self._by_priority if c.priority <= cls.priority)
+        if not queued_ahead and self._has_capacity(cls):
+            self._grant(name, 0.0, now)
+            return
+        if len(state.waiters) >= cls.max_queue or self._overloaded(cls, now):
+            state.shed += 1
+            raise AdmissionRejected(name, cls.retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (now, future)
+        state.waiters.append(entry)
+        try:
+            await asyncio.wait_for(future, cls.max_wait)
+        except BaseException as exc:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up on it.
+                self.release(name)
+            else:
+                try:
+                    state.waiters.remove(entry)
+                except ValueError:
+                    pass
+            if isinstance(exc, asyncio.TimeoutError):
+                state.shed += 1
+                raise AdmissionRejected(name, cls.retry_after) from None
+            raise
+
+    def release(self, name: str) -> None:
+        self._state[name].in_flight -= 1
+        self._in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, name: str) -> AsyncIterator[None]:
+        await self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "classes": {
+                cls.name: {
+                    "priority": cls.priority,
+                    "in_flight": state.in_flight,
+                    "queued": len(state.waiters),
+                    "admitted": state.admitted,
+                    "shed": state.shed,
+                    "queue_delay_ms": round(state.last_delay * 1000, 1),
+                    "standing_delay_ms": round(state.standing_delay * 1000, 1),
+                }
+                for cls in self._by_priority
+                for state in (self._state[cls.name],)
+            },
+        }
+
+
+admission_controller = AdmissionController()
+
+
+def overloaded_response(exc: AdmissionRejected) -> JSONResponse:
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": str(exc.retry_after)})
+
+
+class AdmissionMiddleware:
+    """Takes an admission slot for the request's route class and holds it until the response is sent."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController | None = None,
+        rules: tuple[AdmissionRule, ...] = DEFAULT_ADMISSION_RULES,
+    ) -> None:
+        self.app = app
+        self.controller = controller or admission_controller
+        self.rules = rules
+
+    def _class_for(self, path: str) -> str | None:
+        for rule in self.rules:
+            if path.startswith(rule.prefix):
+                return rule.admission_class
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        name = self._class_for(scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.controller.acquire(name)
+        except AdmissionRejected as exc:
+            await overloaded_response(exc)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
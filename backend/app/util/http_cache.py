@@ -0,0 +1,194 @@
+import gzip
+import hashlib
+import os
+from dataclasses import dataclass
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    prefix: str
+    cache_control: str
+    # ETags are only computed for GET/HEAD, the only requests that can be answered with a 304.
+    etag: bool = True
+
+
+# First matching prefix wins. Quizzes and tutor answers are generated per request (and POSTed),
+# so they are never reused and only get compression. Saved profiles never change once written,
+# so clients revalidate them with If-None-Match instead of downloading them again.
+DEFAULT_CACHE_RULES: tuple[CacheRule, ...] = (
+    CacheRule("/auth", "no-store", etag=False),
+    CacheRule("/fetch", "private, no-store", etag=False),
+    CacheRule("/debug/profiles", "private, no-cache"),
+)
+
+_CONDITIONAL_METHODS = {"GET", "HEAD"}
+_UNCOMPRESSIBLE_TYPES = ("text/event-stream", "image/", "audio/", "video/", "application/zip", "application/gzip")
+
+
+def _parse_accept_encoding(value: str) -> dict[str, float]:
+    encodings: dict[str, float] = {}
+    for part in value.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[token] = quality
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    encodings = _parse_accept_encoding(accept_encoding)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = encodings.get(name, encodings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def _etag_matches(if_none_match: str, base_tag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        # Representations differ only by content-coding suffix ("<hash>-gzip").
+        if tag.strip('"').split("-", 1)[0] == base_tag:
+            return True
+    return False
+
+
+class HTTPCacheMiddleware:
+    """
+    Adds strong content ETags and 304 revalidation for GET/HEAD, per-route Cache-Control and
+    gzip/brotli compression above a size threshold.
+
+    The whole body is buffered to hash and compress it, so streamed responses (SSE) are passed
+    through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: tuple[CacheRule, ...] = DEFAULT_CACHE_RULES,
+        minimum_size: int | None = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ) -> None:
+        self.app = app
+        self.rules = rules
+        self.minimum_size = minimum_size if minimum_size is not None else int(
+            os.getenv("HTTP_COMPRESSION_MIN_BYTES", "1024")
+        )
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _rule_for(self, path: str) -> CacheRule | None:
+        for rule in self.rules:
+            if path == rule.prefix or path.startswith(rule.prefix.rstrip("/") + "/"):
+                return rule
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        rule = self._rule_for(scope["path"])
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        start_message: Message | None = None
+        passthrough = False
+        body_parts: list[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    headers.get("content-encoding")
+                    or content_type.startswith(_UNCOMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._finish(scope, request_headers, rule, encoding, start_message, b"".join(body_parts), send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _finish(
+        self,
+        scope: Scope,
+        request_headers: Headers,
+        rule: CacheRule | None,
+        encoding: str | None,
+        start_message: Message,
+        body: bytes,
+        send: Send,
+    ) -> None:
+        status = start_message["status"]
+        headers = MutableHeaders(raw=list(start_message["headers"]))
+
+        if rule is not None and "cache-control" not in headers:
+            headers["Cache-Control"] = rule.cache_control
+
+        cacheable = (
+            status == 200 and rule is not None and rule.etag and scope["method"] in _CONDITIONAL_METHODS
+        )
+        base_tag = hashlib.blake2b(body, digest_size=16).hexdigest() if cacheable else None
+
+        compressible = len(body) >= self.minimum_size and status not in (204, 304)
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+        encoding = encoding if compressible else None
+        if base_tag is not None:
+            headers["ETag"] = f'"{base_tag}-{encoding}"' if encoding else f'"{base_tag}"'
+
+        if base_tag is not None:
+            if_none_match = request_headers.get("if-none-match")
+            if if_none_match and _etag_matches(if_none_match, base_tag):
+                for name in ("content-length", "content-type"):
+                    if name in headers:
+                        del headers[name]
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        if encoding:
+            if encoding == "br":
+                body = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                body = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+            headers["Content-Encoding"] = encoding
+
+        headers["Content-Length"] = str(len(body))
+        await send({"type": "http.response.start", "status": status, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body if scope["method"] != "HEAD" else b""})
@@ -0,0 +1,205 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from uuid import uuid4
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+PROFILE_HEADER = "x-profile-token"
+
+logger = logging.getLogger(__name__)
+
+
+def profile_token() -> str | None:
+    return os.getenv("PROFILE_TOKEN") or None
+
+
+def has_profile_access(token: str | None) -> bool:
+    expected = profile_token()
+    return bool(expected and token and hmac.compare_digest(token, expected))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Keep paths short: app code relative to the package, libraries by module file name.
+    marker = f"{os.sep}app{os.sep}"
+    if marker in filename:
+        filename = "app" + os.sep + filename.split(marker, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples every thread's Python stack at a fixed interval from a background thread, so work
+    pushed to the threadpool (sync endpoints, run_in_executor) is captured alongside the loop.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(f"thread {names.get(thread_id, thread_id)}")
+                labels.reverse()
+                self.stacks[";".join(labels)] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Brendan Gregg folded-stack format, readable by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    def __init__(self, directory: str | None = None, max_profiles: int | None = None) -> None:
+        self.directory = Path(directory or os.getenv("PROFILE_DIR", "/tmp/api-profiles"))
+        self.max_profiles = max_profiles or int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+    def save(self, profile_id: str, metadata: dict, folded: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile_id}.folded").write_text(folded, encoding="utf-8")
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(metadata), encoding="utf-8")
+        self._prune()
+
+    def list(self) -> list[dict]:
+        if not self.directory.is_dir():
+            return []
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries, key=lambda m: m.get("started_at", 0), reverse=True)
+
+    def load_folded(self, profile_id: str) -> str | None:
+        # Ids are generated uuid hex strings; reject anything that could escape the directory.
+        if not profile_id.isalnum():
+            return None
+        path = self.directory / f"{profile_id}.folded"
+        return path.read_text(encoding="utf-8") if path.is_file() else None
+
+    def _prune(self) -> None:
+        metadata_files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for path in metadata_files[: max(len(metadata_files) - self.max_profiles, 0)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".folded").unlink(missing_ok=True)
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in statistical profiling of individual requests.
+
+    A request is profiled when it carries a valid X-Profile-Token header or is picked by
+    PROFILE_SAMPLE_RATE. All threads are sampled while the request is in flight, so time spent
+    awaiting upstream calls shows up under the event loop's selector. Concurrent requests share
+    the process and may appear in the same profile; only one profile runs at a time.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float | None = None,
+        interval: float | None = None,
+        store: ProfileStore | None = None,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate if sample_rate is not None else float(
+            os.getenv("PROFILE_SAMPLE_RATE", "0")
+        )
+        self.interval = interval or float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000.0
+        self.store = store or profile_store
+        self._busy = threading.Lock()
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        if profile_token() is None:
+            return False
+        return has_profile_access(Headers(scope=scope).get(PROFILE_HEADER))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        status_code = 500
+        started_at = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        sampler = StackSampler(self.interval)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Profile-Id"] = profile_id
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metadata = {
+                "id": profile_id,
+                "method": scope["method"],
+                "route": scope["path"],
+                "status": status_code,
+                "started_at": started_at,
+                "wall_ms": round((time.perf_counter() - wall_start) * 1000, 3),
+                "process_cpu_ms": round((time.process_time() - cpu_start) * 1000, 3),
+                "interval_ms": self.interval * 1000,
+            }
+            # Joining the sampler thread and writing files would block the loop.
+            await asyncio.get_running_loop().run_in_executor(None, self._finish, sampler, metadata)
+
+    def _finish(self, sampler: StackSampler, metadata: dict) -> None:
+        """Stop sampling and store the profile; never lets a storage error replace the request's outcome."""
+        try:
+            sampler.stop()
+            metadata["samples"] = sampler.samples
+            self.store.save(metadata["id"], metadata, sampler.folded())
+        except Exception:
+            logger.exception("Could not save request profile %s", metadata["id"])
+        finally:
+            self._busy.release()
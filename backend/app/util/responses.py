@@ -0,0 +1,14 @@
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+class ModelResponse(Response):
+    """
+    JSON response rendered straight from a Pydantic model by pydantic-core, skipping FastAPI's
+    response validation and jsonable_encoder pass. Unset optional fields are omitted.
+    """
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content, by_alias=True, exclude_unset=True)
+
@@ -0,0 +1,49 @@
+"""
+Embedding throughput and latency: one embedder call per request versus micro-batching.
+
+    cd backend && python -m benchmarks.embedding_bench
+"""
+import asyncio
+import statistics
+import time
+
+from app.services.embedding_service import EmbeddingService, default_embedder
+
+TEXTS = [
+    f"Question {i}: which MIPS instruction loads a word from memory at offset {i * 4} from $sp into $t{i % 8}?"
+    for i in range(2000)
+]
+
+
+async def _timed(call, text: str, latencies: list[float]) -> None:
+    start = time.perf_counter()
+    await call(text)
+    latencies.append(time.perf_counter() - start)
+
+
+async def _run(label: str, call, concurrency: int) -> None:
+    latencies: list[float] = []
+    start = time.perf_counter()
+    for offset in range(0, len(TEXTS), concurrency):
+        await asyncio.gather(*(_timed(call, t, latencies) for t in TEXTS[offset:offset + concurrency]))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<28}{len(TEXTS) / elapsed:>12.0f}{p50:>10.2f}{p99:>10.2f}")
+
+
+async def main(concurrency: int = 64) -> None:
+    embedder = default_embedder()
+    single = EmbeddingService(embedder, max_batch_size=1, max_wait_ms=0)
+    batched = EmbeddingService(embedder)
+    print(f"{type(embedder).__name__}, {concurrency} concurrent callers")
+    print(f"{'mode':<28}{'texts/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    await _run("one call per request", single.embed, concurrency)
+    await _run(f"micro-batched (<= {batched.max_batch_size})", batched.embed, concurrency)
+    single.close()
+    batched.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Per-route serialization cost: FastAPI's default path (jsonable_encoder + stdlib json) versus the
+orjson default response class and direct pydantic-core model serialization.
+
+    cd backend && python -m benchmarks.serialization_bench
+"""
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.models.request_models import AdaptiveQuizResponse, QueryResponse, QuizResponse, Token, UserResponse
+from app.util.responses import ModelResponse
+
+
+def _question(i: int) -> dict:
+    return {
+        "id": str(i),
+        "prompt": f"Which MIPS instruction sequence correctly implements case {i} of the jump table?",
+        "choices": [
+            {"id": cid, "text": f"Choice {cid}: lw $t0, {i * 4}($sp); addi $t1, $t0, {i}", "isCorrect": cid == "B"}
+            for cid in "ABCD"
+        ],
+        "hint": "Think about how the base register and the word offset combine.",
+    }
+
+
+QUIZ = {"moduleId": "3", "questions": [_question(i) for i in range(1, 11)]}
+QUERY = {
+    "result": {
+        "response": "A register is a small, fast storage location inside the CPU. " * 40,
+        "metadata": {"sources": [{"title": f"Lecture {i}", "score": 0.9 - i / 100} for i in range(20)]},
+    }
+}
+ADAPTIVE = {
+    "moduleId": "3", "attemptId": "0b6f", "done": False,
+    "question": {**_question(1), "choices": [{"id": c["id"], "text": c["text"]} for c in _question(1)["choices"]]},
+    "lastAnswerCorrect": True, "answered": 4, "ability": 0.412, "standardError": 0.61,
+}
+TOKEN = {"access_token": "x" * 160, "token_type": "bearer"}
+USER = {"userid": "student42", "message": "Current user: student42"}
+
+ROUTES = [
+    ("POST /fetch/quiz", QUIZ, QuizResponse),
+    ("POST /fetch/query", QUERY, QueryResponse),
+    ("POST /fetch/quiz/next", ADAPTIVE, AdaptiveQuizResponse),
+    ("POST /auth/login", TOKEN, Token),
+    ("GET /auth/users/me", USER, UserResponse),
+]
+
+
+def _per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(number: int = 2000) -> None:
+    print(f"{'route':<24}{'default':>12}{'orjson':>12}{'model':>12}   (us per response)")
+    for route, payload, model_cls in ROUTES:
+        model = model_cls.model_validate(payload)
+        default = _per_call_us(lambda: JSONResponse(jsonable_encoder(payload)).body, number)
+        orjson_only = _per_call_us(lambda: ORJSONResponse(jsonable_encoder(payload)).body, number)
+        direct = _per_call_us(lambda: ModelResponse(model_cls.model_validate(payload)).body, number)
+        assert json.loads(ModelResponse(model).body) == json.loads(JSONResponse(jsonable_encoder(payload)).body)
+        print(f"{route:<24}{default:>12.1f}{orjson_only:>12.1f}{direct:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# Tests that touch the database build their own engines; keep the app's module-level ones off Postgres.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,89 @@
+import pytest
+
+from app.services.adaptive_service import AdaptiveQuizEngine, AdaptiveQuizError, ModuleItemBank, item_difficulty
+
+
+def _question(n: int, difficulty: str) -> dict:
+    return {
+        "id": str(n),
+        "prompt": f"Question number {n}?",
+        "difficulty": difficulty,
+        "choices": [
+            {"id": "A", "text": "right", "isCorrect": True},
+            {"id": "B", "text": "wrong", "isCorrect": False},
+            {"id": "C", "text": "wrong", "isCorrect": False},
+            {"id": "D", "text": "wrong", "isCorrect": False},
+        ],
+    }
+
+
+def _engine() -> AdaptiveQuizEngine:
+    engine = AdaptiveQuizEngine(bank_dir="")
+    levels = ["easy", "medium", "hard"]
+    engine.register_questions("cse230", "1", [_question(n, levels[n % 3]) for n in range(12)])
+    return engine
+
+
+def _run(engine: AdaptiveQuizEngine, answer_right: bool) -> list[str]:
+    attempt = engine.start_attempt("student", "cse230", "1", max_questions=6)
+    served = []
+    while (question := engine.next_question(attempt)) is not None:
+        served.append(question["id"])
+        engine.record_answer(attempt, question["id"], "A" if answer_right else "B")
+    return served
+
+
+def test_item_difficulty_accepts_labels_and_numbers():
+    assert item_difficulty({"difficulty": "Hard"}) == 1.0
+    assert item_difficulty({"difficulty": -0.5}) == -0.5
+    assert item_difficulty({}) == 0.0
+
+
+def test_strong_and_weak_students_get_different_items():
+    strong = _run(_engine(), answer_right=True)
+    weak = _run(_engine(), answer_right=False)
+    assert strong != weak
+
+
+def test_served_question_has_no_answer_key():
+    engine = _engine()
+    question = engine.next_question(engine.start_attempt("student", "cse230", "1", max_questions=3))
+    assert all(set(choice) == {"id", "text"} for choice in question["choices"])
+    assert "difficulty" not in question
+
+
+def test_record_response_recalibrates_difficulty():
+    bank = ModuleItemBank("1")
+    bank.add_question(_question(1, "medium"))
+    before = bank.difficulty[0]
+    for _ in range(20):
+        bank.record_response(0, correct=True)
+    assert bank.difficulty[0] < before
+    for _ in range(60):
+        bank.record_response(0, correct=False)
+    assert bank.difficulty[0] > before
+
+
+def test_banks_are_kept_per_course():
+    engine = _engine()
+    assert len(engine.find_bank("cse230", "1")) == 12
+    assert engine.find_bank("cse240", "1") is None
+
+
+def test_unknown_modules_leave_no_bank_behind():
+    engine = _engine()
+    for n in range(5):
+        with pytest.raises(AdaptiveQuizError):
+            engine.start_attempt("student", "cse230", f"unknown-{n}", max_questions=3)
+    assert len(engine._banks) == 1
+
+
+def test_banks_are_capped_and_attempts_keep_theirs():
+    engine = AdaptiveQuizEngine(bank_dir="", max_banks=2)
+    engine.register_questions("cse230", "1", [_question(n, "medium") for n in range(4)])
+    attempt = engine.start_attempt("student", "cse230", "1", max_questions=4)
+    engine.register_questions("cse230", "2", [_question(n, "medium") for n in range(4)])
+    engine.register_questions("cse230", "3", [_question(n, "medium") for n in range(4)])
+    assert engine.find_bank("cse230", "1") is None
+    question = engine.next_question(attempt)
+    assert engine.record_answer(attempt, question["id"], "A")
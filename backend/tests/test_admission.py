@@ -0,0 +1,148 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.util import admission
+from app.util.admission import AdmissionClass, AdmissionController, AdmissionRejected
+
+
+CLASSES = (
+    AdmissionClass("critical", priority=0),
+    AdmissionClass("serve", priority=1),
+    AdmissionClass("generate", priority=2, max_concurrency=2, target_delay=0.1),
+)
+
+
+def _waiting(controller: AdmissionController, name: str) -> int:
+    return controller.metrics()["classes"][name]["queued"]
+
+
+def test_freed_slots_go_to_the_highest_priority_waiter():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, classes=CLASSES)
+        await controller.acquire("generate")
+        order = []
+
+        async def request(name):
+            async with controller.slot(name):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        tasks = []
+        for name in ("generate", "serve", "critical"):
+            tasks.append(asyncio.create_task(request(name)))
+            await asyncio.sleep(0)
+        controller.release("generate")
+        await asyncio.gather(*tasks)
+        return order, controller.metrics()
+
+    order, metrics = asyncio.run(scenario())
+    assert order == ["critical", "serve", "generate"]
+    assert metrics["in_flight"] == 0
+
+
+def test_generate_is_capped_below_the_global_limit():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=4, classes=CLASSES)
+        await controller.acquire("generate")
+        await controller.acquire("generate")
+        third = asyncio.create_task(controller.acquire("generate"))
+        await asyncio.sleep(0)
+        assert not third.done()
+        assert _waiting(controller, "generate") == 1
+
+        # Other classes still get the remaining global slots.
+        await asyncio.wait_for(controller.acquire("serve"), 1)
+
+        controller.release("generate")
+        await asyncio.wait_for(third, 1)
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["in_flight"] == 3
+    assert metrics["classes"]["generate"]["in_flight"] == 2
+
+
+def test_sheds_only_after_a_full_interval_over_target(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(admission, "time", SimpleNamespace(monotonic=lambda: clock.now))
+
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, classes=CLASSES, interval=1.0)
+        await controller.acquire("generate")
+
+        async def wait_behind_holder(delay):
+            # Queue behind the current holder, which hands its slot over after delay seconds.
+            waiter = asyncio.create_task(controller.acquire("generate"))
+            await asyncio.sleep(0)
+            if waiter.done():
+                return waiter.result()
+            clock.now += delay
+            controller.release("generate")
+            await waiter
+
+        # The first interval started with an immediate admission, so it is treated as a burst.
+        for _ in range(4):
+            await wait_behind_holder(0.25)
+        # Every admission in the next interval waited longer than the target...
+        for _ in range(4):
+            await wait_behind_holder(0.25)
+        # ...so once it closes, arrivals that would have to queue are shed.
+        with pytest.raises(AdmissionRejected) as rejected:
+            await wait_behind_holder(0.25)
+        assert rejected.value.retry_after == CLASSES[2].retry_after
+        assert controller.metrics()["classes"]["generate"]["shed"] == 1
+
+        # Requests that find a free slot are still admitted.
+        controller.release("generate")
+        await controller.acquire("generate")
+
+        # The verdict lapses when no interval has confirmed it for a while.
+        clock.now += 2.0
+        await wait_behind_holder(0.0)
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(
+            max_concurrency=1, classes=(AdmissionClass("generate", priority=0, max_wait=0.01),)
+        )
+        await controller.acquire("generate")
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("generate")
+        assert _waiting(controller, "generate") == 0
+        controller.release("generate")
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["in_flight"] == 0
+    assert metrics["classes"]["generate"]["shed"] == 1
+
+
+def test_slot_handed_over_as_the_waiter_times_out_is_returned(monkeypatch):
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, classes=CLASSES)
+        await controller.acquire("serve")
+
+        async def handed_over_at_timeout(future, timeout):
+            # The holder finishes and dispatch grants this waiter just as its wait expires.
+            controller.release("serve")
+            assert future.done()
+            raise asyncio.TimeoutError
+
+        with monkeypatch.context() as patch:
+            patch.setattr(admission.asyncio, "wait_for", handed_over_at_timeout)
+            with pytest.raises(AdmissionRejected):
+                await controller.acquire("serve")
+
+        # The granted slot was released, so the next request is admitted without queueing.
+        assert controller.metrics()["in_flight"] == 0
+        await asyncio.wait_for(controller.acquire("serve"), 1)
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["in_flight"] == 1
+    assert metrics["classes"]["serve"]["queued"] == 0
@@ -0,0 +1,39 @@
+from app.services.ai_service import StreamTextDecoder, frame_text
+
+
+def _decode(chunks: list[str]) -> list[str]:
+    decoder = StreamTextDecoder()
+    texts = []
+    for chunk in chunks:
+        texts += decoder.feed(chunk)
+    return texts + decoder.close()
+
+
+def test_sse_frames_split_across_chunks():
+    chunks = ['data: {"response": "Hel', 'lo"}\n\nevent: meta\ndata: {"usage": 3}\n\n', 'data: " there"\n\ndata: [DONE]\n\n']
+    assert _decode(chunks) == ["Hello", " there"]
+
+
+def test_sse_plain_data_lines_are_joined():
+    assert _decode(["data: line one\ndata: line two\n\n"]) == ["line one\nline two"]
+
+
+def test_ndjson_frames():
+    chunks = ['{"text": "a"}\n{"te', 'xt": "b"}\n{"choices": [{"delta": {"content": "c"}}]}']
+    assert _decode(chunks) == ["a", "b", "c"]
+
+
+def test_single_json_document_is_decoded_at_the_end():
+    decoder = StreamTextDecoder()
+    assert decoder.feed('{\n  "response": "whole') == []
+    assert decoder.feed(' answer",\n  "metadata": {}\n}') == []
+    assert decoder.close() == ["whole answer"]
+
+
+def test_plain_text_passes_through():
+    assert _decode(["MIPS has ", "32 registers."]) == ["MIPS has ", "32 registers."]
+
+
+def test_frame_text_ignores_metadata_frames():
+    assert frame_text({"type": "metadata", "sources": []}) == ""
+    assert frame_text({"result": {"response": "nested"}}) == "nested"
@@ -0,0 +1,89 @@
+from app.services.conversation_service import (
+    CHARS_PER_TOKEN,
+    MIN_TRUNCATED_TURN_TOKENS,
+    ConversationStore,
+    estimate_tokens,
+)
+
+
+def _store(**kwargs) -> ConversationStore:
+    settings = {"recent_turns": 4, "token_budget": 200, "summary_tokens": 40}
+    settings.update(kwargs)
+    return ConversationStore(**settings)
+
+
+def test_context_fits_the_budget():
+    store = _store()
+    session = store.get_or_create("student", None)
+    for n in range(3):
+        store.record(session, f"question {n} " + "q" * 120, f"answer {n} " + "a" * 120)
+    prompt = "p" * 200
+    context = store.build_context(session, prompt, "course notes " + "c" * 400)
+    assert estimate_tokens(prompt) + estimate_tokens(context) <= store.token_budget + 8
+
+
+def test_newest_turn_that_does_not_fit_is_truncated():
+    store = _store(token_budget=100)
+    session = store.get_or_create("student", None)
+    store.record(session, "short question", "x" * 1000)
+    context = store.build_context(session, "prompt")
+    assert "Tutor: xxx" in context
+    assert context.endswith("...")
+    assert "Student: short question" not in context
+
+
+def test_turn_share_below_the_minimum_is_dropped():
+    store = _store(token_budget=MIN_TRUNCATED_TURN_TOKENS + 10)
+    session = store.get_or_create("student", None)
+    store.record(session, "question", "y" * 400)
+    prompt = "p" * (15 * CHARS_PER_TOKEN)
+    assert store.build_context(session, prompt) is None
+
+
+def test_oversized_prompt_keeps_no_bare_ellipsis():
+    store = _store(token_budget=100)
+    session = store.get_or_create("student", None)
+    store.record(session, "question", "answer")
+    store.record(session, "question two", "answer two")
+    store.record(session, "question three", "answer three")
+    assert session.summary
+    assert store.build_context(session, "p" * 500, "caller context") is None
+
+
+def test_old_turns_are_folded_into_the_summary():
+    store = _store(recent_turns=2)
+    session = store.get_or_create("student", None)
+    store.record(session, "What is a register? More detail here.", "A small fast storage cell. It lives in the CPU.")
+    store.record(session, "What is memory?", "Slower storage.")
+    assert [turn.text for turn in session.turns] == ["What is memory?", "Slower storage."]
+    assert session.summary == "Student: What is a register?\nTutor: A small fast storage cell."
+    context = store.build_context(session, "next")
+    assert context.startswith("Conversation summary:\nStudent: What is a register?")
+    assert context.endswith("Recent conversation:\nStudent: What is memory?\nTutor: Slower storage.")
+
+
+def test_summary_keeps_the_newest_lines():
+    store = _store(recent_turns=2, summary_tokens=10)
+    session = store.get_or_create("student", None)
+    for n in range(5):
+        store.record(session, f"Question {n}.", f"Answer {n}.")
+    assert len(session.summary) <= 10 * CHARS_PER_TOKEN
+    assert session.summary.endswith("Tutor: Answer 3.")
+
+
+def test_issued_only_ignores_unknown_session_ids():
+    store = _store()
+    session = store.get_or_create("anonymous", "picked-by-client", issued_only=True)
+    assert session.session_id != "picked-by-client"
+    assert store.get_or_create("anonymous", session.session_id, issued_only=True) is session
+    assert store.get_or_create("alice", "picked-by-client").session_id == "picked-by-client"
+
+
+def test_least_recently_used_sessions_are_evicted():
+    store = _store(max_sessions=2)
+    first = store.get_or_create("student", "1")
+    store.get_or_create("student", "2")
+    store.get_or_create("student", "1")
+    store.get_or_create("student", "3")
+    assert store.get_or_create("student", "1") is first
+    assert store.get_or_create("student", "2", issued_only=True).session_id != "2"
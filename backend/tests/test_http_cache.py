@@ -0,0 +1,102 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.util.http_cache import HTTPCacheMiddleware, choose_encoding
+
+
+BODY = "mov $t0, $t1\n" * 200
+
+
+async def text(request):
+    return PlainTextResponse(BODY if request.query_params.get("size") != "small" else "ok")
+
+
+async def events(request):
+    async def stream():
+        for n in range(3):
+            yield f"data: {n}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+def _client() -> TestClient:
+    app = Starlette(routes=[
+        Route("/debug/profiles/1", text),
+        Route("/fetch/quiz", text, methods=["POST"]),
+        Route("/fetch/query/stream", events, methods=["POST"]),
+    ])
+    app.add_middleware(HTTPCacheMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("*") in ("gzip", "br")
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+
+
+def test_brotli_is_preferred_when_installed():
+    pytest.importorskip("brotli")
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0.5") == "gzip"
+
+
+def test_gzip_when_accepted():
+    response = _client().get("/debug/profiles/1", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == BODY
+
+
+def test_identity_when_not_accepted():
+    response = _client().get("/debug/profiles/1", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == str(len(BODY))
+
+
+def test_small_responses_are_not_compressed():
+    response = _client().get("/debug/profiles/1?size=small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert response.text == "ok"
+
+
+def test_event_streams_pass_through():
+    with _client().stream("POST", "/fetch/query/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        chunks = list(response.iter_raw())
+    assert "content-encoding" not in response.headers
+    assert "etag" not in response.headers
+    assert b"".join(chunks) == b"data: 0\n\ndata: 1\n\ndata: 2\n\n"
+
+
+def test_matching_etag_gets_304():
+    client = _client()
+    first = client.get("/debug/profiles/1", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["etag"]
+    assert etag.endswith('-gzip"')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = client.get("/debug/profiles/1", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    # The same representation without content coding still matches.
+    identity = client.get("/debug/profiles/1", headers={"Accept-Encoding": "identity", "If-None-Match": f"W/{etag}"})
+    assert identity.status_code == 304
+
+    stale = client.get("/debug/profiles/1", headers={"If-None-Match": '"0123"'})
+    assert stale.status_code == 200
+
+
+def test_post_responses_are_compressed_without_etags():
+    response = _client().post("/fetch/quiz", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "private, no-store"
+    assert "etag" not in response.headers
+    assert response.text == BODY
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.domain_models import Base
+from app.services.question_bank_service import QuestionBankService
+
+
+def _question(n: int) -> dict:
+    return {"id": str(n), "prompt": f"Question {n}?", "choices": [{"id": "A", "text": "a", "isCorrect": True}]}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_save_skips_questions_already_banked(db):
+    bank = QuestionBankService(min_questions=1)
+    assert bank.save_questions(db, "cse230", "1", [_question(1), _question(2), _question(2)]) == 2
+    assert bank.save_questions(db, "cse230", "1", [_question(2), _question(3)]) == 1
+    assert bank.count(db, "cse230", "1") == 3
+    # The same prompt is new to another course.
+    assert bank.save_questions(db, "cse240", "1", [_question(1)]) == 1
+
+
+def test_sampled_quiz_has_no_repeated_prompts(db):
+    bank = QuestionBankService(min_questions=3)
+    for _ in range(3):
+        bank.save_questions(db, "cse230", "1", [_question(n) for n in range(5)])
+    quiz = bank.sample_quiz(db, "cse230", "1", 5)
+    assert sorted(q["prompt"] for q in quiz) == sorted(_question(n)["prompt"] for n in range(5))
+
+
+def test_checkpointed_batches_skip_banked_questions(db):
+    bank = QuestionBankService()
+    checkpoint = bank.get_checkpoint(db, "run", "cse230", "1", target=3)
+    bank.save_batch(db, checkpoint, [_question(1), _question(2)])
+    bank.save_batch(db, checkpoint, [_question(2), _question(3)])
+    assert bank.count(db, "cse230", "1") == 3
+    assert checkpoint.status == "done"
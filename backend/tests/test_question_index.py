@@ -0,0 +1,79 @@
+from app.services.embedding_service import HashingEmbedder
+from app.services.question_index import MinHasher, ModuleQuestionHistory, QuestionIndex, question_fingerprint_text
+
+
+QUESTION = "Which MIPS instruction loads a 32-bit word from memory into a register?"
+
+
+def test_signature_is_stable_across_hashers():
+    assert MinHasher().signature(QUESTION) == MinHasher().signature(QUESTION)
+
+
+def test_similarity_tracks_overlap():
+    hasher = MinHasher()
+    same = hasher.similarity(hasher.signature(QUESTION), hasher.signature(QUESTION))
+    unrelated = hasher.similarity(
+        hasher.signature(QUESTION),
+        hasher.signature("What does the jal instruction store in the $ra register before jumping?"),
+    )
+    assert same == 1.0
+    assert unrelated < 0.3
+
+
+def test_cosmetic_edits_are_duplicates():
+    index = QuestionIndex(threshold=0.7)
+    index.add(QUESTION)
+    assert index.find_duplicate("which MIPS instruction loads a 32 bit word from memory into a register")
+    assert index.find_duplicate(
+        "Which MIPS instruction loads a 32-bit word from memory into a register? Choose one."
+    )
+
+
+def test_different_questions_are_not_duplicates():
+    index = QuestionIndex(threshold=0.7)
+    index.add(QUESTION)
+    assert not index.find_duplicate("Which MIPS instruction stores a byte from a register to memory?")
+    assert index.add_if_new("How many general-purpose registers does the MIPS architecture define?")
+    assert len(index) == 2
+
+
+def test_max_entries_evicts_oldest():
+    index = QuestionIndex(max_entries=2)
+    index.add("first question about the stack pointer register usage")
+    index.add("second question about branch delay slots in the pipeline")
+    index.add("third question about sign extension of immediate values")
+    assert len(index) == 2
+    assert not index.find_duplicate("first question about the stack pointer register usage")
+    assert index.find_duplicate("third question about sign extension of immediate values")
+
+
+def test_fingerprint_ignores_choice_order():
+    a = {"prompt": "Pick one", "choices": [{"text": "lw"}, {"text": "sw"}]}
+    b = {"prompt": "Pick one", "choices": [{"text": "sw"}, {"text": "lw"}]}
+    assert question_fingerprint_text(a) == question_fingerprint_text(b)
+
+
+def test_history_seeds_once_and_caps_modules():
+    history = ModuleQuestionHistory(max_modules=2)
+    history.seed(("cse230", "1"), [QUESTION])
+    history.seed(("cse230", "1"), [])
+    assert history.index_for(("cse230", "1")).find_duplicate(QUESTION)
+    assert not history.index_for(("cse240", "1")).find_duplicate(QUESTION)
+
+    history.index_for(("cse230", "2"))
+    history.index_for(("cse230", "1"))
+    history.index_for(("cse230", "3"))
+    assert history.is_seeded(("cse230", "1"))
+    assert not history.is_seeded(("cse230", "2"))
+
+
+def test_embeddings_catch_reordered_questions():
+    embedder = HashingEmbedder()
+    original = "Which register holds the return address after a jal instruction executes?"
+    reordered = "After a jal instruction executes, which register holds the return address?"
+    vectors = embedder.embed([original, reordered, QUESTION])
+    index = QuestionIndex(threshold=0.99, semantic_threshold=0.95)
+    index.add(original, vector=vectors[0])
+    assert not index.find_duplicate(reordered)
+    assert index.find_duplicate(reordered, vector=vectors[1])
+    assert index.add_if_new(QUESTION, vectors[2])
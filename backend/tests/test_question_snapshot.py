@@ -0,0 +1,94 @@
+import pytest
+
+from app.services.question_snapshot import QuestionSnapshot, SnapshotFormatError, SnapshotReader, write_snapshot
+
+
+def _question(module_id: str, n: int) -> dict:
+    return {
+        "id": str(n),
+        "prompt": f"Module {module_id} question {n}?",
+        "choices": [
+            {"id": "A", "text": "wrong", "isCorrect": False},
+            {"id": "B", "text": "right", "isCorrect": True},
+        ],
+        "hint": "",
+    }
+
+
+def _modules(count: int) -> dict:
+    return {
+        ("cse230", "1"): [_question("1", n) for n in range(count)],
+        ("cse230", "10"): [_question("10", n) for n in range(2)],
+        ("cse240", "1"): [_question("other course 1", n) for n in range(1)],
+    }
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "bank.qbs"
+    version = write_snapshot(path, _modules(3), version=7)
+    snapshot = QuestionSnapshot(path)
+    assert version == snapshot.version == 7
+    assert snapshot.question_count == 6
+    assert snapshot.module_count("cse230", "1") == 3
+    assert snapshot.module_count("cse230", "10") == 2
+    assert snapshot.module_count("cse240", "1") == 1
+    assert snapshot.module_count("cse230", "missing") == 0
+    assert snapshot.module_questions("cse230", "1") == _modules(3)[("cse230", "1")]
+    assert snapshot.module_questions("cse240", "1") == _modules(3)[("cse240", "1")]
+
+
+def test_sample_is_drawn_from_the_module(tmp_path):
+    path = tmp_path / "bank.qbs"
+    write_snapshot(path, _modules(5))
+    sample = QuestionSnapshot(path).sample("cse230", "1", 3)
+    assert len(sample) == 3
+    assert len({q["id"] for q in sample}) == 3
+    assert all(q["prompt"].startswith("Module 1 ") for q in sample)
+
+
+def test_reader_needs_enough_questions(tmp_path):
+    path = tmp_path / "bank.qbs"
+    write_snapshot(path, _modules(3))
+    reader = SnapshotReader(str(path))
+    assert len(reader.sample("cse230", "1", 2)) == 2
+    assert reader.sample("cse230", "1", 2, min_questions=4) is None
+    assert reader.sample("cse230", "2", 1) is None
+    assert reader.sample("cse240", "1", 2) is None
+
+
+def test_reader_picks_up_a_republished_snapshot(tmp_path):
+    path = tmp_path / "bank.qbs"
+    write_snapshot(path, _modules(2), version=1)
+    reader = SnapshotReader(str(path), check_interval=0)
+    old = reader.current()
+    write_snapshot(path, _modules(4), version=2)
+    new = reader.current()
+    assert new.version == 2
+    assert new.module_count("cse230", "1") == 4
+    # Callers holding the previous mapping can still read it.
+    assert old.module_count("cse230", "1") == 2
+    assert old.question(0)["id"] == "0"
+
+
+def test_reader_keeps_serving_when_the_new_file_is_bad(tmp_path):
+    path = tmp_path / "bank.qbs"
+    write_snapshot(path, _modules(2), version=1)
+    reader = SnapshotReader(str(path), check_interval=0)
+    assert reader.current().version == 1
+    path.write_bytes(b"XXXX" + bytes(64))
+    assert reader.current().version == 1
+
+
+def test_bad_magic_is_rejected(tmp_path):
+    path = tmp_path / "bank.qbs"
+    path.write_bytes(b"XXXX" + bytes(64))
+    with pytest.raises(SnapshotFormatError):
+        QuestionSnapshot(path)
+    path.write_bytes(b"QBS1")
+    with pytest.raises(SnapshotFormatError):
+        QuestionSnapshot(path)
+
+
+def test_missing_path_serves_nothing(tmp_path):
+    assert SnapshotReader(str(tmp_path / "absent.qbs")).current() is None
+    assert SnapshotReader("").current() is None
@@ -0,0 +1,25 @@
+import pytest
+
+from app.services.tenant_service import TenantConfig
+
+
+def test_token_comes_from_the_named_variable(monkeypatch):
+    monkeypatch.setenv("CSE240_TEST_TOKEN", "secret")
+    config = TenantConfig.from_dict("cse240", {"api_token_env": "CSE240_TEST_TOKEN"})
+    assert config.token() == "secret"
+
+
+def test_unset_token_variable_is_rejected(monkeypatch):
+    monkeypatch.delenv("CSE240_TEST_TOKEN", raising=False)
+    with pytest.raises(ValueError, match="CSE240_TEST_TOKEN"):
+        TenantConfig.from_dict("cse240", {"api_token_env": "CSE240_TEST_TOKEN"})
+
+
+def test_unknown_settings_are_rejected():
+    with pytest.raises(ValueError, match="api_key"):
+        TenantConfig.from_dict("cse240", {"api_key": "x"})
+
+
+def test_title_defaults_to_the_course_id():
+    assert TenantConfig.from_dict("cse240", {}).title == "cse240"
+    assert TenantConfig.from_dict("cse240", {"course_name": "CSE 240 Systems"}).title == "CSE 240 Systems"